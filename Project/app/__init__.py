@@ -1,44 +1,12 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-import logging
-
-from .api.routes import router
-from .core.config import settings
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("app.log")
-    ]
-)
-
-logger = logging.getLogger(__name__)
-
-# Create FastAPI app
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
-)
-
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(router)
-
-@app.get("/")
-async def root():
-    return {"message": "Welcome to the Document Intelligence RAG API"}
-
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+from typing import Any
+
+def __getattr__(name: str) -> Any:
+    """
+    Load the FastAPI app from app.main on first access, so `uvicorn app:app`
+    keeps working while importing a submodule (as the document processing
+    worker processes do) doesn't build the app and load the API stack with it.
+    """
+    if name == "app":
+        from .main import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
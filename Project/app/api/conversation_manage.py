@@ -1,27 +1,54 @@
 import uuid
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator, BinaryIO
 import logging
 import json
 import os
 import time
+import atexit
+import threading
+from collections import OrderedDict, deque
+from itertools import islice
 
 from ..core.config import settings
 
+try:
+    import orjson
+    
+    def _dumps_line(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    
+    _loads = orjson.loads
+except ImportError:
+    def _dumps_line(obj: Any) -> bytes:
+        return (json.dumps(obj, separators=(',', ':')) + '\n').encode('utf-8')
+    
+    _loads = json.loads
+
 logger = logging.getLogger(__name__)
 
 class ConversationManager:
     """Manager for conversation tracking and history."""
     
-    def __init__(self, storage_dir: str = "./data/conversations"):
+    def __init__(self, storage_dir: str = "./data/conversations", max_cached: int = 512,
+                 max_messages: int = 1024):
         """
         Initialize the conversation manager.
         
         Args:
             storage_dir: Directory to store conversation data
+            max_cached: Maximum number of conversations kept in memory
+            max_messages: Maximum number of recent messages kept in memory per conversation
         """
         self.storage_dir = storage_dir
         os.makedirs(storage_dir, exist_ok=True)
-        self.conversations = {}
+        self.conversations: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._max_cached = max_cached
+        self._max_messages = max_messages
+        self._fhandles: Dict[str, BinaryIO] = {}
+        # Requests use the manager from worker threads; one lock guards the
+        # in-memory cache and the open log files
+        self._lock = threading.RLock()
+        atexit.register(self.close)
         logger.info(f"Initialized conversation manager with storage directory: {storage_dir}")
     
     def create_conversation(self, document_id: str) -> str:
@@ -44,8 +71,9 @@ class ConversationManager:
             "messages": []
         }
         
-        self.conversations[conversation_id] = conversation
-        self._save_conversation(conversation)
+        with self._lock:
+            self._save_conversation(conversation)
+            self._cache_conversation(conversation)
         
         logger.info(f"Created new conversation: {conversation_id}")
         return conversation_id
@@ -65,24 +93,27 @@ class ConversationManager:
             None
         """
         try:
-            conversation = self._get_conversation(conversation_id)
+            with self._lock:
+                conversation = self._get_conversation(conversation_id)
             
-            if not conversation:
-                raise ValueError(f"Conversation not found: {conversation_id}")
+                if not conversation:
+                    raise ValueError(f"Conversation not found: {conversation_id}")
             
-            message = {
-                "role": role,
-                "content": content,
-                "timestamp": time.time()
-            }
+                message = {
+                    "role": role,
+                    "content": content,
+                    "timestamp": time.time()
+                }
             
-            if response and role == "assistant":
-                message["response_data"] = response
+                if response and role == "assistant":
+                    message["response_data"] = response
             
-            conversation["messages"].append(message)
-            conversation["updated_at"] = time.time()
+                # Written to the log first, so memory never holds a message the log lacks
+                self._append_message(conversation_id, message)
             
-            self._save_conversation(conversation)
+                conversation["messages"].append(message)
+                conversation["history"].append({"role": role, "content": content})
+                conversation["updated_at"] = message["timestamp"]
             
             logger.info(f"Added {role} message to conversation: {conversation_id}")
             
@@ -102,18 +133,53 @@ class ConversationManager:
             List[Dict[str, Any]]: List of messages
         """
         try:
-            conversation = self._get_conversation(conversation_id)
+            with self._lock:
+                conversation = self._get_conversation(conversation_id)
+            
+                if not conversation:
+                    return []
+            
+                return self._latest(conversation["messages"], limit)
+            
+        except Exception as e:
+            logger.error(f"Error getting conversation history: {e}")
+            return []
+    
+    def get_llm_history(self, conversation_id: str, limit: int = 10) -> List[Dict[str, str]]:
+        """
+        Get conversation history reduced to the role and content of each message,
+        as passed to the LLM.
+        
+        Args:
+            conversation_id: Conversation ID
+            limit: Maximum number of messages to return
+            
+        Returns:
+            List[Dict[str, str]]: List of messages with role and content
+        """
+        try:
+            with self._lock:
+                conversation = self._get_conversation(conversation_id)
             
-            if not conversation:
-                return []
+                if not conversation:
+                    return []
             
-            messages = conversation.get("messages", [])
-            return messages[-limit:] if limit > 0 else messages
+                return self._latest(conversation["history"], limit)
             
         except Exception as e:
             logger.error(f"Error getting conversation history: {e}")
             return []
     
+    @staticmethod
+    def _latest(messages: deque, limit: int) -> List[Dict[str, Any]]:
+        """Return the last `limit` items of a deque without walking the whole deque."""
+        if limit <= 0:
+            return list(messages)
+        
+        latest = list(islice(reversed(messages), limit))
+        latest.reverse()
+        return latest
+    
     def _get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a conversation by ID.
@@ -125,27 +191,95 @@ class ConversationManager:
             Optional[Dict[str, Any]]: Conversation data or None
         """
         if conversation_id in self.conversations:
+            self.conversations.move_to_end(conversation_id)
             return self.conversations[conversation_id]
         
-        conversation_path = os.path.join(self.storage_dir, f"{conversation_id}.json")
+        meta_path = self._meta_path(conversation_id)
+        legacy_path = os.path.join(self.storage_dir, f"{conversation_id}.json")
         
-        if os.path.exists(conversation_path):
-            try:
-                with open(conversation_path, 'r') as f:
-                    conversation = json.load(f)
+        try:
+            if os.path.exists(meta_path):
+                with open(meta_path, 'rb') as f:
+                    conversation = _loads(f.read())
+                
+                conversation["messages"] = list(self._iter_messages(conversation_id))
+                if conversation["messages"]:
+                    conversation["updated_at"] = conversation["messages"][-1]["timestamp"]
                     
-                self.conversations[conversation_id] = conversation
-                return conversation
+            elif os.path.exists(legacy_path):
+                # Conversations saved before the append-only log was introduced
+                # are migrated to the new layout on first access. The old file is
+                # kept under another name rather than deleted.
+                with open(legacy_path, 'rb') as f:
+                    conversation = _loads(f.read())
+                
+                self._save_conversation(conversation)
+                os.replace(legacy_path, f"{legacy_path}.migrated")
                 
-            except Exception as e:
-                logger.error(f"Error loading conversation from disk: {e}")
+            else:
                 return None
+                
+        except Exception as e:
+            logger.error(f"Error loading conversation from disk: {e}")
+            return None
+        
+        self._cache_conversation(conversation)
+        return conversation
+    
+    def _cache_conversation(self, conversation: Dict[str, Any]) -> None:
+        """
+        Keep a conversation in memory, evicting the least recently used one
+        when the cache is full. Evicted conversations are reloaded from disk.
+        
+        Only the most recent messages are held in memory, alongside a
+        role/content projection of them used for LLM prompts.
+        
+        Args:
+            conversation: Conversation data
+            
+        Returns:
+            None
+        """
+        messages = deque(conversation.get("messages", []), maxlen=self._max_messages)
+        conversation["messages"] = messages
+        conversation["history"] = deque(
+            ({"role": message["role"], "content": message["content"]} for message in messages),
+            maxlen=self._max_messages
+        )
+        
+        self.conversations[conversation["id"]] = conversation
+        self.conversations.move_to_end(conversation["id"])
+        
+        while len(self.conversations) > self._max_cached:
+            evicted_id, _ = self.conversations.popitem(last=False)
+            self._close_handle(evicted_id)
+    
+    def _iter_messages(self, conversation_id: str) -> Iterator[Dict[str, Any]]:
+        """
+        Stream messages from a conversation's append-only log.
+        
+        Args:
+            conversation_id: Conversation ID
+            
+        Returns:
+            Iterator[Dict[str, Any]]: Messages in the order they were added
+        """
+        log_path = self._log_path(conversation_id)
         
-        return None
+        if not os.path.exists(log_path):
+            return
+        
+        with open(log_path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield _loads(line)
     
     def _save_conversation(self, conversation: Dict[str, Any]) -> None:
         """
-        Save a conversation to disk.
+        Save a conversation's metadata and full message log to disk.
+        
+        Only needed when a conversation is created or migrated; new messages
+        are appended with _append_message.
         
         Args:
             conversation: Conversation data
@@ -155,11 +289,62 @@ class ConversationManager:
         """
         try:
             conversation_id = conversation["id"]
-            conversation_path = os.path.join(self.storage_dir, f"{conversation_id}.json")
+            metadata = {key: value for key, value in conversation.items() if key not in ("messages", "history")}
             
-            with open(conversation_path, 'w') as f:
-                json.dump(conversation, f, indent=2)
+            with open(self._meta_path(conversation_id), 'wb') as f:
+                f.write(_dumps_line(metadata))
+            
+            self._close_handle(conversation_id)
+            with open(self._log_path(conversation_id), 'wb') as f:
+                f.writelines(_dumps_line(message) for message in conversation.get("messages", []))
                 
         except Exception as e:
             logger.error(f"Error saving conversation to disk: {e}")
-            raise
\ No newline at end of file
+            raise
+    
+    def _append_message(self, conversation_id: str, message: Dict[str, Any]) -> None:
+        """
+        Append a single message to a conversation's log.
+        
+        Args:
+            conversation_id: Conversation ID
+            message: Message data
+            
+        Returns:
+            None
+        """
+        try:
+            f = self._fhandles.get(conversation_id)
+            if f is None:
+                f = open(self._log_path(conversation_id), 'ab', buffering=64 * 1024)
+                self._fhandles[conversation_id] = f
+            
+            f.write(_dumps_line(message))
+            # Flushing hands the line to the OS without rewriting anything,
+            # so other workers reading the log see it immediately.
+            f.flush()
+                
+        except Exception as e:
+            logger.error(f"Error appending message to conversation log: {e}")
+            raise
+    
+    def _close_handle(self, conversation_id: str) -> None:
+        """Close the open log file for a conversation, if any."""
+        f = self._fhandles.pop(conversation_id, None)
+        if f is not None:
+            f.close()
+    
+    def close(self) -> None:
+        """Flush and close all open conversation logs."""
+        with self._lock:
+            for conversation_id in list(self._fhandles):
+                try:
+                    self._close_handle(conversation_id)
+                except Exception as e:
+                    logger.warning(f"Error closing conversation log {conversation_id}: {e}")
+    
+    def _meta_path(self, conversation_id: str) -> str:
+        return os.path.join(self.storage_dir, f"{conversation_id}.meta.json")
+    
+    def _log_path(self, conversation_id: str) -> str:
+        return os.path.join(self.storage_dir, f"{conversation_id}.jsonl")
@@ -1,36 +1,41 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
 
-class EmbeddingRequest(BaseModel):
+class APIModel(BaseModel):
+    """Base model for API payloads: immutable, ignores unknown fields."""
+    model_config = ConfigDict(extra='ignore', frozen=True, populate_by_name=True)
+
+class EmbeddingRequest(APIModel):
     document: str = Field(..., description="Filename of the document to embed")
 
-class EmbeddingResponse(BaseModel):
+class EmbeddingResponse(APIModel):
     status: str
     message: str
     document_id: str
 
-class Citation(BaseModel):
+class Citation(APIModel):
     page: int
     document_name: str
 
-class Answer(BaseModel):
+class Answer(APIModel):
     answer: str
     citations: List[Citation]
 
-class QueryRequest(BaseModel):
+class QueryRequest(APIModel):
     query: str = Field(..., description="User query")
     document_id: str = Field(..., description="ID of the document to query")
     require_citations: bool = Field(True, description="Whether to include citations")
     conversation_id: Optional[str] = Field(None, description="ID for conversation tracking")
+    stream: bool = Field(False, description="Stream the answer as server-sent events")
 
-class QueryResponse(BaseModel):
+class QueryResponse(APIModel):
     status: str
     response: Optional[Answer] = None
     message: Optional[str] = None
     conversation_id: Optional[str] = None
     error_details: Optional[str] = None
 
-class ErrorResponse(BaseModel):
+class ErrorResponse(APIModel):
     status: str = "error"
     message: str
     error_details: Optional[str] = None
\ No newline at end of file
@@ -1,29 +1,23 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 import logging
 import os
 import tempfile
 import uuid
 from typing import List, Optional, Dict, Any
-import shutil
+import aiofiles
+import numpy as np
+import orjson
 
 from .models import EmbeddingRequest, EmbeddingResponse, QueryRequest, QueryResponse, ErrorResponse
+from .services import Services, get_services
 from ..core.config import settings
-from ..document_processing.processor import BaseDocumentProcessor
-from ..embeddings.embedding_provider import EmbeddingService
-from ..retrieval.vector_store import VectorStore
-from ..retrieval.reranker import Reranker
-from ..llm.llm_provider import OllamaProvider
-from app.api.conversation_manage import ConversationManager
+from ..document_processing.processor import BaseDocumentProcessor, DocumentChunk
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-vector_store = VectorStore()
-embedding_service = EmbeddingService()
-reranker = Reranker()
-llm_service = OllamaProvider()
-conversation_manager = ConversationManager()
+UPLOAD_CHUNK_SIZE = 1 << 20
 
 async def save_upload_file(upload_file: UploadFile) -> str:
     """
@@ -40,8 +34,11 @@ async def save_upload_file(upload_file: UploadFile) -> str:
         unique_filename = f"{uuid.uuid4()}{file_ext}"
         file_path = os.path.join(settings.DOCUMENT_UPLOAD_FOLDER, unique_filename)
         
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                await buffer.write(chunk)
+        
+        await upload_file.close()
         
         return file_path
         
@@ -49,13 +46,149 @@ async def save_upload_file(upload_file: UploadFile) -> str:
         logger.error(f"Error saving uploaded file: {e}")
         raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
 
-@router.post("/api/embedding", response_model=EmbeddingResponse)
-async def embed_document(document: UploadFile = File(...)):
+def process_document(processor: BaseDocumentProcessor, file_path: str) -> List[DocumentChunk]:
+    """
+    Process and chunk a saved document.
+    
+    Args:
+        processor: Processor for the document's file type
+        file_path: Path to the saved document
+        
+    Returns:
+        List[DocumentChunk]: Chunks ready for embedding
+    """
+    processed_doc = processor.process(file_path)
+    logger.info(f"Processed document: {processed_doc.metadata.get('source', 'unknown')}")
+    
+    doc_chunks = processor.chunk(processed_doc)
+    logger.info(f"Generated {len(doc_chunks)} chunks")
+    
+    return doc_chunks
+
+def retrieve_chunks(services: Services, query: str, query_embedding: np.ndarray, 
+                    document_id: str) -> List[Dict[str, Any]]:
+    """
+    Retrieve candidate chunks for a query and re-rank them.
+    
+    Args:
+        services: Shared API services
+        query: User query
+        query_embedding: Embedding of the query
+        document_id: ID of the document to search
+        
+    Returns:
+        List[Dict[str, Any]]: Re-ranked chunks, empty if nothing was retrieved
+    """
+    retrieved_chunks = services.vector_store.query(
+        query_text=query,
+        embedding=query_embedding,
+        document_id=document_id,
+        n_results=10
+    )
+    
+    if not retrieved_chunks:
+        return []
+    
+    reranked_chunks = services.reranker.rerank(query, retrieved_chunks, top_k=5)
+    logger.info(f"Re-ranked {len(reranked_chunks)} chunks")
+    
+    return reranked_chunks
+
+def record_turn(services: Services, conversation_id: Optional[str], document_id: str,
+                query: str, response: Dict[str, Any]) -> str:
+    """
+    Add a query and its answer to a conversation, creating the conversation if needed.
+    
+    Args:
+        services: Shared API services
+        conversation_id: ID of the conversation, or None to start one
+        document_id: ID of the queried document
+        query: User query
+        response: Answer and citations
+        
+    Returns:
+        str: ID of the conversation
+    """
+    conversation_manager = services.conversation_manager
+    if not conversation_id:
+        conversation_id = conversation_manager.create_conversation(document_id)
+    
+    conversation_manager.add_message(conversation_id, "user", query)
+    conversation_manager.add_message(conversation_id, "assistant", response["answer"], response)
+    
+    return conversation_id
+
+def sse_event(data: Dict[str, Any]) -> bytes:
+    """Encode a server-sent event carrying JSON data."""
+    return b"data: " + orjson.dumps(data) + b"\n\n"
+
+def stream_events(*events: Dict[str, Any]) -> StreamingResponse:
+    """Send already available results as server-sent events."""
+    async def events_iterator():
+        for event in events:
+            yield sse_event(event)
+    
+    return StreamingResponse(events_iterator(), media_type="text/event-stream")
+
+async def stream_answer(services: Services, request: QueryRequest,
+                        conversation_history: Optional[List[Dict[str, Any]]],
+                        context: List[Dict[str, Any]], query_embedding: Optional[np.ndarray],
+                        cache_key: str):
+    """
+    Stream an answer as server-sent events: a {"token": ...} event for each piece
+    of the answer as Ollama generates it, then the same payload the non-streaming
+    endpoint returns.
+    
+    Args:
+        services: Shared API services
+        request: Query request
+        conversation_history: Earlier turns of the conversation, if any
+        context: Re-ranked chunks to answer from
+        query_embedding: Embedding to cache the answer under, or None to skip caching
+        cache_key: Exact-match cache key of the query
+    """
+    try:
+        response = None
+        async for event in services.llm_service.stream_response(
+            query=request.query,
+            context=context,
+            conversation_history=conversation_history,
+            require_citations=request.require_citations
+        ):
+            if "token" in event:
+                yield sse_event(event)
+            else:
+                response = event["response"]
+        
+        if query_embedding is not None:
+            await services.run_blocking(services.query_cache.put, cache_key, query_embedding,
+                                        request.document_id, request.require_citations, response)
+        
+        conversation_id = await services.run_blocking(record_turn, services, request.conversation_id,
+                                                      request.document_id, request.query, response)
+        
+        yield sse_event({
+            "status": "success",
+            "response": response,
+            "conversation_id": conversation_id
+        })
+        
+    except Exception as e:
+        logger.error(f"Error streaming query response: {e}")
+        yield sse_event({
+            "status": "error",
+            "message": "Failed to process query.",
+            "error_details": str(e)
+        })
+
+@router.post("/api/embedding", response_model=EmbeddingResponse, response_model_exclude_none=True)
+async def embed_document(document: UploadFile = File(...), services: Services = Depends(get_services)):
     """
     Embed a document.
     
     Args:
         document: Uploaded document file
+        services: Shared API services
         
     Returns:
         EmbeddingResponse: Response with document ID
@@ -69,16 +202,13 @@ async def embed_document(document: UploadFile = File(...)):
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
         
-        processed_doc = processor.process(file_path)
-        logger.info(f"Processed document: {processed_doc.metadata.get('source', 'unknown')}")
-        
-        doc_chunks = processor.chunk(processed_doc)
-        logger.info(f"Generated {len(doc_chunks)} chunks")
+        doc_chunks = await services.run_blocking(process_document, processor, file_path)
         
-        document_data = embedding_service.embed_document_chunks(doc_chunks)
+        embeddings = await services.embedding_batcher.embed([chunk.text for chunk in doc_chunks])
+        document_data = services.embedding_service.package_document_chunks(doc_chunks, embeddings)
         logger.info(f"Generated embeddings for {len(document_data['chunks'])} chunks")
         
-        document_id = vector_store.add_document(document_data)
+        document_id = await services.run_blocking(services.vector_store.add_document, document_data)
         logger.info(f"Stored document in vector database: {document_id}")
         
         return {
@@ -90,7 +220,7 @@ async def embed_document(document: UploadFile = File(...)):
     except Exception as e:
         logger.error(f"Error embedding document: {e}")
         error_detail = str(e) if not isinstance(e, HTTPException) else e.detail
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "status": "error",
@@ -99,13 +229,14 @@ async def embed_document(document: UploadFile = File(...)):
             }
         )
 
-@router.post("/api/query", response_model=QueryResponse)
-async def query_document(request: QueryRequest):
+@router.post("/api/query", response_model=QueryResponse, response_model_exclude_none=True)
+async def query_document(request: QueryRequest, services: Services = Depends(get_services)):
     """
     Query a document.
     
     Args:
         request: Query request
+        services: Shared API services
         
     Returns:
         QueryResponse: Response with answer and citations
@@ -118,60 +249,70 @@ async def query_document(request: QueryRequest):
         
         logger.info(f"Received query request: {query} for document: {document_id}")
         
-        query_embedding = embedding_service.provider.get_embeddings([query])[0]
-        
-        retrieved_chunks = vector_store.query(
-            query_text=query,
-            embedding=query_embedding,
-            document_id=document_id,
-            n_results=10
-        )
-        
-        if not retrieved_chunks:
-            logger.warning(f"No relevant chunks found for query: {query}")
-            return {
-                "status": "success",
-                "response": {
-                    "answer": "I couldn't find any relevant information in the document to answer your question.",
-                    "citations": []
-                },
-                "conversation_id": conversation_id or conversation_manager.create_conversation(document_id)
-            }
-        
-        reranked_chunks = reranker.rerank(query, retrieved_chunks, top_k=5)
-        logger.info(f"Re-ranked {len(reranked_chunks)} chunks")
+        conversation_manager = services.conversation_manager
+        query_cache = services.query_cache
         
         conversation_history = None
         if conversation_id:
-            history = conversation_manager.get_conversation_history(conversation_id)
-            if history:
-                conversation_history = [
-                    {"role": msg["role"], "content": msg["content"]}
-                    for msg in history
-                ]
-        response = llm_service.generate_response(
-            query=query,
-            context=reranked_chunks,
-            conversation_history=conversation_history,
-            require_citations=require_citations
-        )
+            conversation_history = await services.run_blocking(conversation_manager.get_llm_history, conversation_id) or None
         
-        if not conversation_id:
-            conversation_id = conversation_manager.create_conversation(document_id)
+        # Answers that build on earlier turns can't be reused for other conversations
+        use_cache = not conversation_history
+        cache_key = query_cache.make_key(query, document_id, require_citations)
+        response = query_cache.get_exact(cache_key) if use_cache else None
         
-        conversation_manager.add_message(conversation_id, "user", query)
-        conversation_manager.add_message(conversation_id, "assistant", response["answer"], response)
+        if response is None:
+            query_embedding = await services.run_blocking(services.embedding_service.embed_query, query)
+            if use_cache:
+                response = await services.run_blocking(query_cache.get_similar, query_embedding, document_id, require_citations)
         
-        return {
+        if response is None:
+            reranked_chunks = await services.run_blocking(retrieve_chunks, services, query, query_embedding, document_id)
+            
+            if not reranked_chunks:
+                logger.warning(f"No relevant chunks found for query: {query}")
+                result = {
+                    "status": "success",
+                    "response": {
+                        "answer": "I couldn't find any relevant information in the document to answer your question.",
+                        "citations": []
+                    },
+                    "conversation_id": conversation_id or await services.run_blocking(conversation_manager.create_conversation, document_id)
+                }
+                return stream_events(result) if request.stream else result
+            
+            if request.stream:
+                return StreamingResponse(
+                    stream_answer(services, request, conversation_history, reranked_chunks,
+                                  query_embedding if use_cache else None, cache_key),
+                    media_type="text/event-stream"
+                )
+            
+            response = await services.llm_service.generate_response(
+                query=query,
+                context=reranked_chunks,
+                conversation_history=conversation_history,
+                require_citations=require_citations
+            )
+            
+            if use_cache:
+                await services.run_blocking(query_cache.put, cache_key, query_embedding, document_id, require_citations, response)
+        else:
+            logger.info(f"Serving cached response for query: {query}")
+        
+        conversation_id = await services.run_blocking(record_turn, services, conversation_id, document_id, query, response)
+        
+        result = {
             "status": "success",
             "response": response,
             "conversation_id": conversation_id
         }
+        return stream_events(result) if request.stream else result
         
     except Exception as e:
         logger.error(f"Error processing query: {e}")
         error_detail = str(e) if not isinstance(e, HTTPException) else e.detail
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "status": "error",
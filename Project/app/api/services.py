@@ -0,0 +1,85 @@
+from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from ..embeddings.embedding_provider import EmbeddingService
+from ..embeddings.embedding_batcher import EmbeddingBatcher
+from ..retrieval.vector_store import VectorStore, get_vector_store
+from ..retrieval.reranker import Reranker
+from ..retrieval.query_cache import QueryCache
+from ..llm.llm_provider import OllamaProvider
+from ..document_processing.process_pool import shutdown_process_pool, warm_up_process_pool
+from ..document_processing.processor import close_processors
+from .conversation_manage import ConversationManager
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class Services:
+    """Long-lived services shared by the API routes, created once per worker process."""
+
+    def __init__(self, vector_store: VectorStore, embedding_service: EmbeddingService,
+                 reranker: Reranker):
+        """
+        Initialize the shared services.
+
+        Args:
+            vector_store: Vector store for document embeddings
+            embedding_service: Service used to embed chunks and queries
+            reranker: Re-ranker for retrieved chunks
+        """
+        self.vector_store = vector_store
+        self.embedding_service = embedding_service
+        self.reranker = reranker
+        self.llm_service = OllamaProvider()
+        self.conversation_manager = ConversationManager()
+        self.query_cache = QueryCache(client=vector_store.client, fingerprint=self.llm_service.fingerprint)
+
+        # Document processing and embedding are blocking; they run here so
+        # the event loop stays free to serve other requests.
+        self.executor = ThreadPoolExecutor(max_workers=4)
+
+        # Chunks from concurrent uploads are embedded together in shared batches.
+        self.embedding_batcher = EmbeddingBatcher(embedding_service.provider, executor=self.executor)
+
+    async def run_blocking(self, func, *args, **kwargs):
+        """Run a blocking callable on the shared worker pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def close(self) -> None:
+        """Release resources held by the services."""
+        self.conversation_manager.close()
+        await self.llm_service.close()
+        self.executor.shutdown(wait=False)
+        self.embedding_service.close()
+        close_processors()
+        shutdown_process_pool()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load models and open stores once per worker, off the event loop."""
+    vector_store, embedding_service, reranker = await asyncio.gather(
+        asyncio.to_thread(get_vector_store),
+        asyncio.to_thread(EmbeddingService),
+        asyncio.to_thread(Reranker)
+    )
+    app.state.services = Services(vector_store, embedding_service, reranker)
+    if settings.MODEL_WARMUP:
+        await asyncio.gather(
+            app.state.services.llm_service.warm_up(),
+            asyncio.to_thread(warm_up_process_pool)
+        )
+    logger.info("Initialized API services")
+
+    try:
+        yield
+    finally:
+        await app.state.services.close()
+
+def get_services(request: Request) -> Services:
+    """FastAPI dependency returning the services created by the lifespan handler."""
+    return request.app.state.services
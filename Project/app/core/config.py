@@ -13,15 +13,25 @@ class Settings(BaseSettings):
     LLM_PROVIDER: str = "ollama"     
     LLM_API_KEY: Optional[str] = None
     LLM_TEMPERATURE: float = 0.1
+    OLLAMA_BASE_URL: str = "http://13.234.177.214:11434"
+    OLLAMA_NUM_PARALLEL: int = 4  # concurrent requests sent to Ollama; match the server's OLLAMA_NUM_PARALLEL
+    LLM_CONTEXT_DOCUMENT_ORDER: bool = False  # context in document order instead of rerank order, so repeat retrievals reuse Ollama's prefix cache
     
     # Embedding Settings
     EMBEDDING_MODEL: str = "BAAI/bge-small-en"
-    EMBEDDING_PROVIDER: str = "local"  # 'local', 'openai', etc.
+    EMBEDDING_PROVIDER: str = "local"  # 'local', 'onnx' (INT8, needs optimum[onnxruntime]) or 'ollama'; for 'ollama' EMBEDDING_MODEL names an Ollama model
     EMBEDDING_DIMENSION: int = 384
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBED_CACHE_SIZE: int = 4096  # chunk embeddings kept in memory, 0 to disable
+    EMBEDDING_MODEL_ONNX: str = "./data/models/embedding-onnx-int8"
+    EMBEDDING_CACHE_PATH: str = ""  # SQLite file for chunk embeddings, e.g. ./data/cache/embeddings.sqlite3; empty disables
+    EMBEDDING_CACHE_MAX_ROWS: int = 100000  # oldest entries are evicted beyond this
     
     # Re-ranker Settings
     RERANKER_MODEL: str = "BAAI/bge-reranker-base"
     RERANKER_PROVIDER: str = "local"
+    RERANKER_BATCH_SIZE: int = 32
+    MODEL_WARMUP: bool = True  # run one dummy input through each model at start-up
     
     # Vector DB Settings
     VECTOR_DB: str = "chroma"
@@ -35,6 +45,8 @@ class Settings(BaseSettings):
     # Chunking Settings
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 100
+    TEXT_SPLITTER: str = "langchain"  # 'langchain' or 'rust' (needs semantic-text-splitter)
+    CHUNK_CACHE_DIR: str = "./data/cache/chunks"
     
     # Base path for the project
     BASE_PATH: Path = Path(__file__).resolve().parent.parent.parent
@@ -47,4 +59,5 @@ settings = Settings()
 
 os.makedirs(settings.DOCUMENT_UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(settings.DOCUMENT_PROCESSED_FOLDER, exist_ok=True)
-os.makedirs(settings.VECTOR_DB_PATH, exist_ok=True)
\ No newline at end of file
+os.makedirs(settings.VECTOR_DB_PATH, exist_ok=True)
+os.makedirs(settings.CHUNK_CACHE_DIR, exist_ok=True)
\ No newline at end of file
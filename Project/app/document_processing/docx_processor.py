@@ -1,25 +1,64 @@
 import docx
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.ns import qn, nsmap
+from lxml import etree
 import os
 import logging
-from typing import Dict, List, Any, Optional
-import pytesseract
+from typing import List, Any, Tuple
 from PIL import Image
 import io
-import re
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import threading
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
-from .processor import BaseDocumentProcessor, Document, DocumentChunk
+from .processor import BaseDocumentProcessor, Document, DocumentChunk, cache_chunks
+from .ocr import ocr_images
 from ..core.config import settings
 
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
 logger = logging.getLogger(__name__)
 
+# Run content of a paragraph, read straight from the XML. Mirrors python-docx's
+# Paragraph.text without creating Paragraph and Run objects for every paragraph.
+_RUN_CONTENT = etree.XPath("w:r/* | w:hyperlink/w:r/*", namespaces={"w": nsmap["w"]})
+_P = qn("w:p")
+_T = qn("w:t")
+_BR = qn("w:br")
+_BR_TYPE = qn("w:type")
+_RUN_CHARS = {qn("w:tab"): "\t", qn("w:ptab"): "\t", qn("w:cr"): "\n", qn("w:noBreakHyphen"): "-"}
+
+def _paragraph_text(paragraph: etree._Element) -> str:
+    """Get the text of a w:p element, matching python-docx's Paragraph.text."""
+    parts = []
+    for element in _RUN_CONTENT(paragraph):
+        tag = element.tag
+        if tag == _T:
+            parts.append(element.text or "")
+        elif tag == _BR:
+            # Page and column breaks have no text equivalent
+            if element.get(_BR_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        else:
+            char = _RUN_CHARS.get(tag)
+            if char:
+                parts.append(char)
+    return "".join(parts)
+
 class DocxProcessor(BaseDocumentProcessor):
     def __init__(self):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.CHUNK_SIZE,
-            chunk_overlap=settings.CHUNK_OVERLAP,
-            length_function=len
-        )
+        super().__init__()
+        # tesserocr runs Tesseract in-process and outside the GIL, so images can be
+        # recognised concurrently. The pool lives as long as the processor so each
+        # worker keeps its engine; threads are only started once there are images
+        # to recognise. Without tesserocr, images go to the shared worker processes.
+        self._ocr_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+        self._ocr_local = threading.local()
+        self._ocr_apis = []
+        self._ocr_apis_lock = threading.Lock()
     
     def process(self, file_path: str) -> Document:
         """
@@ -37,86 +76,149 @@ class DocxProcessor(BaseDocumentProcessor):
         try:
             doc = docx.Document(file_path)
             
+            pages, page_count = self._walk_paragraphs(doc)
+            
             doc_metadata = {
                 "source": os.path.basename(file_path),
                 "file_path": file_path,
                 "file_type": "docx",
-                "page_count": self._estimate_page_count(doc),
+                "page_count": page_count,
                 "title": doc.core_properties.title or "",
                 "author": doc.core_properties.author or "",
                 "creation_date": str(doc.core_properties.created) if doc.core_properties.created else "",
             }
             
-            text_content = []
-            
-            pages = self._estimate_pages(doc)
-            
-            full_text = ""
-            for i, (page_num, page_content) in enumerate(pages.items(), 1):
-                full_text += f"--- Page {page_num} ---\n{page_content}\n\n"
+            document_text, page_spans = self._join_pages(pages, separator="")
             
+            # Text from images has no page of its own; chunks from it are attributed
+            # to the last page
             image_text = self._process_images(doc)
             if image_text:
-                full_text += f"\n--- Images OCR Text ---\n{image_text}"
+                document_text = "".join((document_text, "\n\n--- Images OCR Text ---\n", image_text))
             
-            return Document(full_text, doc_metadata)
+            return Document(document_text, doc_metadata, page_spans)
             
         except Exception as e:
             logger.error(f"Error processing DOCX file: {e}")
             raise
     
-    def _estimate_page_count(self, doc: docx.Document) -> int:
-        """Estimate the number of pages in a DOCX document."""
-        words_per_page = 500
-        total_words = sum(len(paragraph.text.split()) for paragraph in doc.paragraphs)
-        return max(1, round(total_words / words_per_page))
-    
-    def _estimate_pages(self, doc: docx.Document) -> Dict[int, str]:
+    def _walk_paragraphs(self, doc: docx.Document) -> Tuple[List[str], int]:
         """
-        Estimate page breaks in the document and return text by page.
+        Estimate page breaks and the page count in a single pass over the paragraphs.
         This is an approximation since docx doesn't have direct page information.
+        
+        Returns:
+            Tuple of text by estimated page (page N at index N-1) and the word-based page count
         """
         chars_per_page = 3000
-        pages = {}
-        current_page = 1
-        current_page_text = ""
+        words_per_page = 500
+        pages: List[str] = []
+        page_buffer = []
+        page_length = 0
+        total_words = 0
         
-        for paragraph in doc.paragraphs:
-            current_page_text += paragraph.text + "\n"
+        for paragraph in doc.element.body.iterchildren(_P):
+            text = _paragraph_text(paragraph)
+            if text:
+                total_words += text.count(" ") + 1
+            
+            paragraph_text = text + "\n"
+            page_buffer.append(paragraph_text)
+            page_length += len(paragraph_text)
             
-            if len(current_page_text) > chars_per_page:
-                pages[current_page] = current_page_text
-                current_page += 1
-                current_page_text = ""
+            if page_length > chars_per_page:
+                pages.append("".join(page_buffer))
+                page_buffer.clear()
+                page_length = 0
         
-        if current_page_text:
-            pages[current_page] = current_page_text
+        if page_buffer or not pages:
+            pages.append("".join(page_buffer))
         
-        if not pages:
-            pages[1] = ""
-            
-        return pages
+        page_count = max(1, round(total_words / words_per_page))
+        return pages, page_count
     
     def _process_images(self, doc: docx.Document) -> str:
         """Extract text from images in the document using OCR."""
-        image_texts = []
+        image_blobs = []
         
         try:
             for rel in doc.part.rels.values():
-                if "image" in rel.target_ref:
+                if rel.reltype != RT.IMAGE or rel.is_external:
+                    continue
+                try:
+                    image_blobs.append(rel.target_part.blob)
+                except Exception as e:
+                    logger.warning(f"Failed to read image: {e}")
+        except Exception as e:
+            logger.warning(f"Failed to extract images from document: {e}")
+        
+        if not image_blobs:
+            return ""
+        
+        if tesserocr is None:
+            texts = self._ocr_files(image_blobs)
+        else:
+            texts = list(self._ocr_executor.map(self._ocr_one, image_blobs))
+        
+        return "\n\n".join(text for text in texts if text and not text.isspace())
+    
+    def _ocr_files(self, image_blobs: List[bytes]) -> List[str]:
+        """
+        Apply OCR to images with tesseract in the shared worker processes, which
+        is where tesseract's thread limit is set. Images that can't be read are skipped.
+        """
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                image_paths = []
+                for i, image_blob in enumerate(image_blobs):
                     try:
-                        image_blob = rel.target_part.blob
-                        image = Image.open(io.BytesIO(image_blob))
-                        text = pytesseract.image_to_string(image, lang=settings.OCR_LANGUAGE)
-                        if text and not text.isspace():
-                            image_texts.append(text)
+                        image_path = os.path.join(tmpdir, f"img_{i}.png")
+                        Image.open(io.BytesIO(image_blob)).save(image_path)
+                        image_paths.append(image_path)
                     except Exception as e:
                         logger.warning(f"Failed to process image: {e}")
+                
+                return ocr_images(image_paths)
         except Exception as e:
-            logger.warning(f"Failed to extract images from document: {e}")
+            logger.warning(f"Failed to apply OCR to images: {e}")
+            return []
+    
+    def _ocr_one(self, image_blob: bytes) -> str:
+        """Apply OCR to a single embedded image with this thread's tesserocr engine."""
+        try:
+            image = Image.open(io.BytesIO(image_blob))
+            api = self._ocr_api()
+            api.SetImage(image)
+            return api.GetUTF8Text()
+        except Exception as e:
+            logger.warning(f"Failed to process image: {e}")
+            return ""
+    
+    def _ocr_api(self) -> "tesserocr.PyTessBaseAPI":
+        """
+        Get this thread's Tesseract engine, initializing it on first use.
+        Reusing the engine avoids spawning a tesseract process and reloading
+        the language model for every image.
+        """
+        api = getattr(self._ocr_local, "api", None)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(lang=settings.OCR_LANGUAGE)
+            self._ocr_local.api = api
+            with self._ocr_apis_lock:
+                self._ocr_apis.append(api)
+        return api
+    
+    def close(self) -> None:
+        """Stop the OCR threads and free their Tesseract engines."""
+        self._ocr_executor.shutdown(wait=True)
         
-        return "\n\n".join(image_texts)
+        with self._ocr_apis_lock:
+            apis = self._ocr_apis
+            self._ocr_apis = []
+        for api in apis:
+            api.End()
     
+    @cache_chunks
     def chunk(self, document: Document) -> List[DocumentChunk]:
         """
         Split a document into chunks for embedding.
@@ -130,36 +232,8 @@ class DocxProcessor(BaseDocumentProcessor):
         logger.info(f"Chunking document: {document.metadata.get('source', 'unknown')}")
         
         try:
-            chunks = self.text_splitter.split_text(document.text)
-            
-            doc_chunks = []
-            for i, chunk_text in enumerate(chunks):
-                page_numbers = []
-                page_pattern = re.compile(r"--- Page (\d+) ---")
-                for match in page_pattern.finditer(chunk_text):
-                    page_numbers.append(int(match.group(1)))
-                
-                if not page_numbers:
-                    total_length = len(document.text)
-                    chunk_start = document.text.find(chunk_text)
-                    relative_position = chunk_start / total_length if total_length > 0 else 0
-                    estimated_page = max(1, min(
-                        round(relative_position * document.metadata.get("page_count", 1)), 
-                        document.metadata.get("page_count", 1)
-                    ))
-                    page_numbers = [estimated_page]
-                
-                chunk_metadata = document.metadata.copy()
-                chunk_metadata.update({
-                    "chunk_id": i,
-                    "pages": page_numbers,
-                    "page": page_numbers[0] if page_numbers else 1, 
-                })
-                
-                doc_chunks.append(DocumentChunk(chunk_text, chunk_metadata))
-            
-            return doc_chunks
+            return self.chunk_text_with_spans(document)
             
         except Exception as e:
             logger.error(f"Error chunking document: {e}")
-            raise
\ No newline at end of file
+            raise
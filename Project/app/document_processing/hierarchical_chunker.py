@@ -1,5 +1,5 @@
 # app/document_processing/hierarchical_chunker.py
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 from .semantic_chunker import SemanticChunker
 from .processor import DocumentChunk
@@ -41,14 +41,19 @@ class HierarchicalChunker:
     def create_hierarchical_chunks(
         self,
         text: str,
-        metadata: Dict[str, Any] = None
+        metadata: Dict[str, Any] = None,
+        page_spans: Optional[List[Tuple[int, int, int]]] = None
     ) -> Dict[str, List[Dict[str, Any]]]:
         """
         Create a hierarchical structure of chunks.
+        Parents get their pages from page_spans (or page markers in the text);
+        children inherit their parent's pages unless they contain page markers.
         
         Args:
             text: Input text
             metadata: Metadata to include with chunks
+            page_spans: Optional (start, end, page number) of each page of text,
+                e.g. Document.page_spans
             
         Returns:
             Dictionary with parent and child chunks
@@ -57,21 +62,14 @@ class HierarchicalChunker:
             metadata = {}
             
       
-        parent_chunks = self.parent_chunker.create_chunks(text, metadata)
+        parent_chunks = self.parent_chunker.create_chunks(text, metadata, page_spans)
      
-        all_child_chunks = []
+        parents = [
+            (parent["text"], {**parent["metadata"], "parent_index": i})
+            for i, parent in enumerate(parent_chunks)
+        ]
         
-        for i, parent in enumerate(parent_chunks):
-            parent_text = parent["text"]
-            parent_metadata = parent["metadata"].copy()
-            
-
-            parent_metadata["parent_index"] = i
-            
-       
-            child_chunks = self.child_chunker.create_chunks(parent_text, parent_metadata)
-            
-            all_child_chunks.extend(child_chunks)
+        all_child_chunks = self._create_child_chunks(parents)
             
         logger.info(f"Created hierarchical structure with {len(parent_chunks)} parents and {len(all_child_chunks)} children")
         
@@ -80,10 +78,29 @@ class HierarchicalChunker:
             "children": all_child_chunks
         }
     
+    def _create_child_chunks(self, parents: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Split parent chunks into child chunks. This is cheap regex work, so it runs
+        in-process; shipping the chunker and parent texts to worker processes
+        would cost more than it saves.
+        
+        Args:
+            parents: Text and metadata of each parent chunk
+            
+        Returns:
+            List of child chunks in parent order
+        """
+        all_child_chunks = []
+        for parent_text, parent_metadata in parents:
+            all_child_chunks.extend(self.child_chunker.iter_chunks(parent_text, parent_metadata))
+        
+        return all_child_chunks
+    
     def create_document_chunks(
         self,
         text: str,
-        metadata: Dict[str, Any] = None
+        metadata: Dict[str, Any] = None,
+        page_spans: Optional[List[Tuple[int, int, int]]] = None
     ) -> List[DocumentChunk]:
         """
         Create document chunks compatible with the existing API.
@@ -91,6 +108,7 @@ class HierarchicalChunker:
         Args:
             text: Input text
             metadata: Metadata to include with chunks
+            page_spans: Optional (start, end, page number) of each page of text
             
         Returns:
             List of DocumentChunk objects
@@ -98,24 +116,20 @@ class HierarchicalChunker:
         if metadata is None:
             metadata = {}
    
-        chunks = self.create_hierarchical_chunks(text, metadata)
+        chunks = self.create_hierarchical_chunks(text, metadata, page_spans)
         
 
         doc_chunks = []
         
    
         for i, parent in enumerate(chunks["parents"]):
-            parent_metadata = parent["metadata"].copy()
-            parent_metadata["chunk_type"] = "parent"
-            parent_metadata["chunk_id"] = f"parent_{i}"
+            parent_metadata = {**parent["metadata"], "chunk_type": "parent", "chunk_id": f"parent_{i}"}
             
             doc_chunks.append(DocumentChunk(parent["text"], parent_metadata))
         
 
         for i, child in enumerate(chunks["children"]):
-            child_metadata = child["metadata"].copy()
-            child_metadata["chunk_type"] = "child"
-            child_metadata["chunk_id"] = f"child_{i}"
+            child_metadata = {**child["metadata"], "chunk_type": "child", "chunk_id": f"child_{i}"}
             
             doc_chunks.append(DocumentChunk(child["text"], child_metadata))
             
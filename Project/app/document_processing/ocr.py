@@ -0,0 +1,94 @@
+import os
+import logging
+from typing import List, Optional
+
+from .process_pool import get_process_pool
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Below this many images, starting one tesseract process per image is cheap
+# enough that writing the images to disk for batch mode doesn't pay off.
+OCR_BATCH_MIN_IMAGES = 8
+
+def ocr_image_files(image_paths: List[str]) -> Optional[List[str]]:
+    """
+    Apply OCR to several image files with a single tesseract process.
+    Tesseract reads the images from a list file and separates the text of
+    each image with a form feed.
+
+    Args:
+        image_paths: Paths to the image files
+
+    Returns:
+        Optional[List[str]]: Text for each image in order, or None if the
+        output could not be split per image
+    """
+    if not image_paths:
+        return []
+
+    # Named after the first image so groups of images sharing a directory don't collide
+    list_path = os.path.splitext(image_paths[0])[0] + ".list.txt"
+    with open(list_path, 'w') as list_file:
+        list_file.write("\n".join(image_paths) + "\n")
+
+    import pytesseract
+
+    output = pytesseract.image_to_string(list_path, lang=settings.OCR_LANGUAGE)
+    texts = output.split("\f")
+
+    if len(texts) == len(image_paths) + 1 and not texts[-1].strip():
+        texts.pop()
+
+    if len(texts) != len(image_paths):
+        logger.warning(f"Batch OCR returned {len(texts)} pages for {len(image_paths)} images")
+        return None
+
+    return texts
+
+def ocr_image(image_path: str) -> str:
+    """Apply OCR to an image file. Module-level so worker processes can run it."""
+    import pytesseract
+
+    return pytesseract.image_to_string(image_path, lang=settings.OCR_LANGUAGE)
+
+def _ocr_image_group(image_paths: List[str]) -> List[str]:
+    """Apply OCR to a group of image files with one tesseract process."""
+    texts = ocr_image_files(image_paths)
+    if texts is None:
+        texts = [ocr_image(path) for path in image_paths]
+    return texts
+
+def ocr_images(image_paths: List[str]) -> List[str]:
+    """
+    Apply OCR to image files in parallel worker processes. The workers limit
+    tesseract to one thread each, without changing the API process environment.
+
+    Args:
+        image_paths: Paths to the image files
+
+    Returns:
+        List[str]: Text for each image in order; empty strings if OCR fails
+    """
+    if not image_paths:
+        return []
+
+    try:
+        if len(image_paths) == 1:
+            return [ocr_image(image_paths[0])]
+
+        max_workers = min(len(image_paths), os.cpu_count() or 1)
+        executor = get_process_pool()
+        if len(image_paths) < OCR_BATCH_MIN_IMAGES:
+            return list(executor.map(ocr_image, image_paths))
+
+        # Many images: each worker runs a single tesseract process over a
+        # contiguous group of images instead of one process per image.
+        group_size = -(-len(image_paths) // max_workers)
+        groups = [image_paths[start:start + group_size] for start in range(0, len(image_paths), group_size)]
+
+        return [text for texts in executor.map(_ocr_image_group, groups) for text in texts]
+
+    except Exception as e:
+        logger.error(f"Error performing OCR on {len(image_paths)} images: {e}")
+        return [""] * len(image_paths)
@@ -1,27 +1,33 @@
 import PyPDF2
-from pdf2image import convert_from_path
-import pytesseract
 from PIL import Image
 import os
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import tempfile
 from pathlib import Path
 
-from .processor import BaseDocumentProcessor, Document, DocumentChunk
-from ..core.config import settings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from .processor import BaseDocumentProcessor, Document, DocumentChunk, cache_chunks
+from .ocr import ocr_images
+from .process_pool import get_running_process_pool
 
 logger = logging.getLogger(__name__)
 
+# Smaller PDFs are extracted in-process; handing pages to workers costs more than it saves.
+# Extraction only uses the pool once its workers are running: starting them takes
+# longer than extracting a few dozen pages serially.
+PARALLEL_EXTRACT_MIN_PAGES = 16
+
+def _extract_page_range(page_range: Tuple[str, int, int]) -> List[str]:
+    """Extract the text of pages [start, end) of a PDF. Runs in a worker process."""
+    file_path, start, end = page_range
+    with open(file_path, 'rb') as pdf_file:
+        reader = PyPDF2.PdfReader(pdf_file)
+        return [reader.pages[page_num].extract_text() or "" for page_num in range(start, end)]
+
+# Resolution pages are rendered at for OCR; enough for body text without oversized images
+RENDER_DPI = 200
+
 class PDFProcessor(BaseDocumentProcessor):
-    def __init__(self):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.CHUNK_SIZE,
-            chunk_overlap=settings.CHUNK_OVERLAP,
-            length_function=len
-        )
-    
     def process(self, file_path: str) -> Document:
         """
         Process a PDF file and extract text and metadata.
@@ -50,58 +56,133 @@ class PDFProcessor(BaseDocumentProcessor):
                     "creation_date": metadata.get('/CreationDate', ''),
                 }
                 
-                text_content = []
-                for page_num, page in enumerate(reader.pages):
-                    page_text = page.extract_text()
-                    
+                page_texts = self._extract_page_texts(file_path, reader)
+                
+                scanned_pages = []
+                for page_num, page_text in enumerate(page_texts):
                     if not page_text or page_text.isspace():
                         logger.info(f"Page {page_num+1} has no text, applying OCR")
-                        page_text = self._process_scanned_page(file_path, page_num)
-                    
-                    text_content.append(f"--- Page {page_num+1} ---\n{page_text}")
+                        scanned_pages.append(page_num)
                 
-                document_text = "\n\n".join(text_content)
+                if scanned_pages:
+                    ocr_texts = self._process_scanned_pages(file_path, scanned_pages)
+                    for page_num, page_text in zip(scanned_pages, ocr_texts):
+                        page_texts[page_num] = page_text
                 
-                if not document_text or document_text.isspace():
-                    logger.info("Document appears to be fully scanned, applying OCR to all pages")
-                    document_text = self._process_scanned_document(file_path)
+                if not page_texts:
+                    logger.info("No pages could be read, applying OCR to the whole document")
+                    page_texts = self._process_scanned_document(file_path)
                 
-                return Document(document_text, doc_metadata)
+                document_text, page_spans = self._join_pages(page_texts)
+                
+                return Document(document_text, doc_metadata, page_spans)
                 
         except Exception as e:
             logger.error(f"Error processing PDF file: {e}")
             raise
     
-    def _process_scanned_page(self, pdf_path: str, page_num: int) -> str:
-        """Apply OCR to a specific page of a PDF."""
-        try:
-            images = convert_from_path(pdf_path, first_page=page_num+1, last_page=page_num+1)
-            
-            if not images:
-                return ""
+    def _extract_page_texts(self, file_path: str, reader: PyPDF2.PdfReader) -> List[str]:
+        """
+        Extract the text layer of every page. Large PDFs are split into contiguous
+        page ranges that worker processes extract in parallel, when the shared
+        pool is already running.
+        
+        Args:
+            file_path: Path to the PDF file
+            reader: Reader already opened on the file
             
-            return pytesseract.image_to_string(images[0], lang=settings.OCR_LANGUAGE)
+        Returns:
+            List[str]: Extracted text for each page
+        """
+        page_count = len(reader.pages)
+        max_workers = min(os.cpu_count() or 1, page_count // (PARALLEL_EXTRACT_MIN_PAGES // 2))
+        
+        executor = get_running_process_pool() if page_count >= PARALLEL_EXTRACT_MIN_PAGES else None
+        
+        if executor is not None and max_workers > 1:
+            range_size = -(-page_count // max_workers)
+            page_ranges = [
+                (file_path, start, min(start + range_size, page_count))
+                for start in range(0, page_count, range_size)
+            ]
             
-        except Exception as e:
-            logger.error(f"Error performing OCR on page {page_num}: {e}")
-            return ""
+            try:
+                return [text for texts in executor.map(_extract_page_range, page_ranges) for text in texts]
+            except Exception as e:
+                logger.warning(f"Parallel text extraction failed, extracting serially: {e}")
+        
+        return [page.extract_text() or "" for page in reader.pages]
     
-    def _process_scanned_document(self, pdf_path: str) -> str:
-        """Apply OCR to an entire PDF document."""
-        try:
-            images = convert_from_path(pdf_path)
+    def _process_scanned_pages(self, pdf_path: str, page_nums: List[int]) -> List[str]:
+        """
+        Apply OCR to specific pages of a PDF, returning text in the order given.
+        Runs of consecutive pages are rendered with one pdf2image call each.
+        """
+        page_runs = []
+        for page_num in page_nums:
+            if page_runs and page_runs[-1][1] == page_num - 1:
+                page_runs[-1][1] = page_num
+            else:
+                page_runs.append([page_num, page_num])
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            image_paths = []
+            for first, last in page_runs:
+                run_length = last - first + 1
+                try:
+                    run_paths = self._render_pages(pdf_path, tmpdir, first_page=first+1, last_page=last+1)
+                    run_paths = run_paths + [None] * (run_length - len(run_paths))
+                    image_paths.extend(run_paths[:run_length])
+                except Exception as e:
+                    logger.error(f"Error rendering pages {first+1}-{last+1} for OCR: {e}")
+                    image_paths.extend([None] * run_length)
             
-            text_content = []
-            for i, image in enumerate(images):
-                page_text = pytesseract.image_to_string(image, lang=settings.OCR_LANGUAGE)
-                text_content.append(f"--- Page {i+1} ---\n{page_text}")
+            rendered = [path for path in image_paths if path is not None]
+            texts = iter(ocr_images(rendered))
             
-            return "\n\n".join(text_content)
+            return [next(texts) if path is not None else "" for path in image_paths]
+    
+    def _process_scanned_document(self, pdf_path: str) -> List[str]:
+        """Apply OCR to an entire PDF document, returning the text of each page."""
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                image_paths = self._render_pages(pdf_path, tmpdir)
+                return ocr_images(image_paths)
             
         except Exception as e:
             logger.error(f"Error performing OCR on document: {e}")
-            return ""
+            return []
+    
+    def _render_pages(self, pdf_path: str, output_folder: str,
+                      first_page: Optional[int] = None, last_page: Optional[int] = None) -> List[str]:
+        """
+        Render PDF pages to PNG files for OCR.
+        Pages are written straight to disk by poppler using several threads, so
+        page images are never all held in memory at once.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            output_folder: Directory the page images are written to
+            first_page: First page to render (1-based), or None for the first page
+            last_page: Last page to render (1-based), or None for the last page
+            
+        Returns:
+            List[str]: Paths to the rendered page images in page order
+        """
+        from pdf2image import convert_from_path
+        
+        return convert_from_path(
+            pdf_path,
+            dpi=RENDER_DPI,
+            output_folder=output_folder,
+            first_page=first_page,
+            last_page=last_page,
+            fmt="png",
+            thread_count=os.cpu_count() or 1,
+            paths_only=True
+        )
     
+    @cache_chunks
     def chunk(self, document: Document) -> List[DocumentChunk]:
         """
         Split a document into chunks for embedding.
@@ -115,39 +196,7 @@ class PDFProcessor(BaseDocumentProcessor):
         logger.info(f"Chunking document: {document.metadata.get('source', 'unknown')}")
         
         try:
-            chunks = self.text_splitter.split_text(document.text)
-            
-            doc_chunks = []
-            for i, chunk_text in enumerate(chunks):
-                
-                page_markers = [f"--- Page {p} ---" for p in range(1, document.metadata.get("page_count", 1) + 1)]
-                
-          
-                pages = []
-                for page_num, marker in enumerate(page_markers, 1):
-                    if marker in chunk_text:
-                        pages.append(page_num)
-                
-                if not pages:
-                    total_length = len(document.text)
-                    chunk_start = document.text.find(chunk_text)
-                    relative_position = chunk_start / total_length if total_length > 0 else 0
-                    estimated_page = max(1, min(
-                        round(relative_position * document.metadata.get("page_count", 1)), 
-                        document.metadata.get("page_count", 1)
-                    ))
-                    pages = [estimated_page]
-                
-                chunk_metadata = document.metadata.copy()
-                chunk_metadata.update({
-                    "chunk_id": i,
-                    "pages": pages,
-                    "page": pages[0] if pages else 1, 
-                })
-                
-                doc_chunks.append(DocumentChunk(chunk_text, chunk_metadata))
-            
-            return doc_chunks
+            return self.chunk_text_with_spans(document)
             
         except Exception as e:
             logger.error(f"Error chunking document: {e}")
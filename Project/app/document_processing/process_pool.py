@@ -0,0 +1,77 @@
+from typing import Optional
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _init_worker() -> None:
+    """Limit tesseract to one thread per worker; parallelism comes from the pool."""
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Get the worker process pool shared by the CPU-bound document processing steps
+    (PDF text extraction, OCR, child chunking), creating it on first use.
+
+    Workers are started with "spawn": the API process already runs torch, Chroma
+    and several thread pools, and forking a multithreaded process can leave a
+    child holding a lock no thread will ever release. The pool lives for the
+    whole process so worker start-up is paid once, not on every upload.
+
+    Returns:
+        ProcessPoolExecutor: The shared pool
+    """
+    global _pool
+    with _pool_lock:
+        # A worker that died (e.g. killed for memory) breaks the pool for good
+        if _pool is None or getattr(_pool, "_broken", False):
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+            logger.info(f"Started document processing pool with {_pool._max_workers} workers")
+        return _pool
+
+def get_running_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Get the shared pool only if its workers are already up, for steps too short
+    to be worth starting them for.
+
+    Returns:
+        Optional[ProcessPoolExecutor]: The shared pool, or None if not started
+    """
+    with _pool_lock:
+        if _pool is None or getattr(_pool, "_broken", False):
+            return None
+        return _pool
+
+def _ready(_: int) -> bool:
+    """No-op task used to start a worker."""
+    return True
+
+def warm_up_process_pool() -> None:
+    """
+    Start every worker ahead of the first upload. Spawned workers import the
+    processing modules before taking any work; these only need PyPDF2, the OCR
+    wrappers and the settings, as importing the app package doesn't load the API.
+    """
+    try:
+        pool = get_process_pool()
+        list(pool.map(_ready, range(pool._max_workers)))
+    except Exception as e:
+        logger.warning(f"Document processing pool warm-up failed: {e}")
+
+def shutdown_process_pool() -> None:
+    """Stop the shared worker processes, if they were started."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
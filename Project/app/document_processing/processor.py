@@ -1,29 +1,180 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 import os
+import re
 import logging
+import hashlib
+from bisect import bisect_right
+import pickle
+import tempfile
+import threading
+from functools import lru_cache, wraps
 from ..core.config import settings
 
 logger = logging.getLogger(__name__)
 
+_PAGE_RE = re.compile(r"--- Page (\d+) ---")
+
+# Part of the chunk cache key; bump when chunk() output changes for the same input
+CHUNK_CACHE_VERSION = 3
+
+def pages_for_range(page_spans: List[Tuple[int, int, int]], span_starts: List[int],
+                    start: int, end: int) -> List[int]:
+    """
+    Find the pages that the text range [start, end) overlaps.
+    
+    Args:
+        page_spans: (start, end, page number) of each page, in text order
+        span_starts: Start offset of each page span, for bisecting
+        start: Start offset of the range
+        end: End offset of the range
+        
+    Returns:
+        List[int]: Page numbers, in order
+    """
+    first = max(0, bisect_right(span_starts, start) - 1)
+    last = max(first, bisect_right(span_starts, end - 1) - 1)
+    return [page_spans[j][2] for j in range(first, last + 1)]
+
 class Document:
-    """Class representing a processed document with text and metadata."""
+    """
+    Class representing a processed document with text and metadata.
+    page_spans holds (start, end, page number) for each page's text, so page
+    numbers don't have to be embedded in the text itself.
+    """
     
-    def __init__(self, text: str, metadata: Dict[str, Any]):
+    __slots__ = ("text", "metadata", "page_spans")
+    
+    def __init__(self, text: str, metadata: Dict[str, Any],
+                 page_spans: Optional[List[Tuple[int, int, int]]] = None):
         self.text = text
         self.metadata = metadata
+        self.page_spans = page_spans
 
 class DocumentChunk:
     """Class representing a chunk of a document with text and metadata."""
     
+    # Thousands of chunks are created per document; slots avoid a per-instance __dict__
+    __slots__ = ("text", "metadata")
+    
     def __init__(self, text: str, metadata: Dict[str, Any]):
         self.text = text
         self.metadata = metadata
 
+def cache_chunks(chunk_method):
+    """
+    Decorator for processor chunk() methods that caches results on disk, keyed by
+    the document text, the processor and the chunking settings.
+    
+    Only the text and the chunk-specific metadata (chunk_id, pages, ...) are stored;
+    the document metadata is merged back in on a hit, so the same content uploaded
+    under another name or date still reuses the cached chunks.
+    """
+    @wraps(chunk_method)
+    def wrapper(self, document: Document) -> List[DocumentChunk]:
+        try:
+            cache_path = _chunk_cache_path(self, document)
+        except Exception as e:
+            logger.warning(f"Could not compute chunk cache key: {e}")
+            return chunk_method(self, document)
+        
+        if os.path.exists(cache_path):
+            try:
+                cached = _read_chunk_cache(cache_path)
+                logger.info(f"Loaded {len(cached)} cached chunks for {document.metadata.get('source', 'unknown')}")
+                return [
+                    DocumentChunk(text, {**document.metadata, **chunk_metadata})
+                    for text, chunk_metadata in cached
+                ]
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable chunk cache entry {cache_path}: {e}")
+        
+        chunks = chunk_method(self, document)
+        
+        base_metadata = document.metadata
+        cached = [
+            (chunk.text, {
+                key: value for key, value in chunk.metadata.items()
+                if key not in base_metadata or base_metadata[key] != value
+            })
+            for chunk in chunks
+        ]
+        
+        try:
+            # Write to a temporary file and rename so readers never see a partial entry
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(cache_path), delete=False) as tmp_file:
+                pickle.dump(cached, tmp_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file.name, cache_path)
+        except Exception as e:
+            logger.warning(f"Could not write chunk cache entry {cache_path}: {e}")
+        
+        return chunks
+    
+    return wrapper
+
+def _chunk_cache_path(processor: "BaseDocumentProcessor", document: Document) -> str:
+    """Build the cache file path for a document's chunks."""
+    key = hashlib.blake2b(digest_size=16)
+    key.update(document.text.encode("utf-8", "surrogatepass"))
+    key.update(
+        f"\0{CHUNK_CACHE_VERSION}\0{type(processor).__name__}\0{settings.TEXT_SPLITTER}\0{settings.CHUNK_SIZE}\0{settings.CHUNK_OVERLAP}"
+        f"\0{document.metadata.get('page_count', 1)}\0{document.page_spans}".encode("utf-8")
+    )
+    return os.path.join(settings.CHUNK_CACHE_DIR, f"{key.hexdigest()}.pkl")
+
+def _read_chunk_cache(cache_path: str) -> list:
+    """
+    Load a chunk cache entry. Every call unpickles its own copy, so callers may
+    modify the chunk metadata without affecting later hits.
+    """
+    return pickle.loads(_read_chunk_cache_bytes(cache_path))
+
+@lru_cache(maxsize=128)
+def _read_chunk_cache_bytes(cache_path: str) -> bytes:
+    """Read a chunk cache file; recently used entries are kept in memory."""
+    with open(cache_path, 'rb') as cache_file:
+        return cache_file.read()
+
+class _RustSplitterAdapter:
+    """Exposes the Rust splitter through the split_text interface used by the processors."""
+    
+    def __init__(self, splitter):
+        self._splitter = splitter
+    
+    def split_text(self, text: str) -> List[str]:
+        return self._splitter.chunks(text)
+
+def create_text_splitter():
+    """
+    Create the text splitter configured by settings.TEXT_SPLITTER.
+    Splitter libraries are imported here rather than at module level; langchain
+    alone takes about half a second to import and the API imports this module.
+    
+    Returns:
+        A splitter with a split_text(text) -> List[str] method
+    """
+    if settings.TEXT_SPLITTER == "rust":
+        try:
+            from semantic_text_splitter import TextSplitter
+            return _RustSplitterAdapter(TextSplitter(settings.CHUNK_SIZE, overlap=settings.CHUNK_OVERLAP))
+        except ImportError:
+            logger.warning("semantic-text-splitter is not installed, falling back to the langchain splitter")
+    
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    
+    return RecursiveCharacterTextSplitter(
+        chunk_size=settings.CHUNK_SIZE,
+        chunk_overlap=settings.CHUNK_OVERLAP,
+        length_function=len
+    )
+
 class BaseDocumentProcessor(ABC):
     """Abstract base class for document processors."""
     
+    def __init__(self):
+        self.text_splitter = create_text_splitter()
+    
     @abstractmethod
     def process(self, file_path: str) -> Document:
         """
@@ -50,9 +201,109 @@ class BaseDocumentProcessor(ABC):
         """
         pass
     
+    def close(self) -> None:
+        """Release resources (worker threads, OCR engines) held by the processor."""
+        pass
+    
+    def _chunk_offsets(self, text: str, chunks: List[str]) -> List[int]:
+        """
+        Locate each chunk in the source text with a single forward pass.
+        
+        The splitter emits chunks in order and consecutive chunks overlap by at
+        most CHUNK_OVERLAP characters, so each search can resume from the end
+        of the previous chunk instead of rescanning from the start.
+        """
+        offsets = []
+        search_from = 0
+        
+        for chunk_text in chunks:
+            position = text.find(chunk_text, search_from)
+            if position == -1:
+                position = max(0, text.find(chunk_text))
+            offsets.append(position)
+            search_from = max(0, position + len(chunk_text) - settings.CHUNK_OVERLAP)
+        
+        return offsets
+    
+    def _join_pages(self, page_texts: List[str], separator: str = "\n\n") -> Tuple[str, List[Tuple[int, int, int]]]:
+        """
+        Join page texts into the document text and record where each page lies.
+        
+        Args:
+            page_texts: Text of each page, page 1 first
+            separator: String placed between pages
+            
+        Returns:
+            Tuple of the document text and its (start, end, page number) spans
+        """
+        page_spans = []
+        position = 0
+        separator_length = len(separator)
+        
+        for page_num, page_text in enumerate(page_texts, 1):
+            if page_num > 1:
+                position += separator_length
+            end = position + len(page_text)
+            page_spans.append((position, end, page_num))
+            position = end
+        
+        return separator.join(page_texts), page_spans
+    
+    def _page_spans_from_markers(self, text: str) -> List[Tuple[int, int, int]]:
+        """Derive page spans from "--- Page N ---" markers, for documents built without spans."""
+        matches = list(_PAGE_RE.finditer(text))
+        return [
+            (match.start(), matches[j + 1].start() if j + 1 < len(matches) else len(text), int(match.group(1)))
+            for j, match in enumerate(matches)
+        ]
+    
+    def chunk_text_with_spans(self, document: Document) -> List[DocumentChunk]:
+        """
+        Split a document into chunks and assign each chunk the pages its text
+        overlaps, found by bisecting the document's page spans.
+        
+        Args:
+            document: Document object to chunk
+            
+        Returns:
+            List[DocumentChunk]: List of document chunks
+        """
+        text = document.text
+        chunks = self.text_splitter.split_text(text)
+        offsets = self._chunk_offsets(text, chunks)
+        
+        page_spans = document.page_spans
+        if page_spans is None:
+            page_spans = self._page_spans_from_markers(text)
+        span_starts = [span[0] for span in page_spans]
+        
+        total_length = len(text)
+        page_count = document.metadata.get("page_count", 1)
+        base_metadata = document.metadata
+        
+        doc_chunks = []
+        for i, (chunk_text, chunk_start) in enumerate(zip(chunks, offsets)):
+            if page_spans:
+                pages = pages_for_range(page_spans, span_starts, chunk_start, chunk_start + len(chunk_text))
+            else:
+                relative_position = chunk_start / total_length if total_length > 0 else 0
+                pages = [max(1, min(round(relative_position * page_count), page_count))]
+            
+            chunk_metadata = {
+                **base_metadata,
+                "chunk_id": i,
+                "pages": pages,
+                "page": pages[0],
+            }
+            
+            doc_chunks.append(DocumentChunk(chunk_text, chunk_metadata))
+        
+        return doc_chunks
+    
     def get_processor_for_file(file_path: str) -> 'BaseDocumentProcessor':
         """
         Factory method to get the appropriate processor for a file.
+        Processors hold no per-document state, so one instance per file type is reused.
         
         Args:
             file_path: Path to the document file
@@ -60,17 +311,44 @@ class BaseDocumentProcessor(ABC):
         Returns:
             BaseDocumentProcessor: An instance of the appropriate processor
         """
-        from .pdf_processor import PDFProcessor
-        from .docx_processor import DocxProcessor
-        from .txt_processor import TxtProcessor
-        
         ext = Path(file_path).suffix.lower()
-        
-        if ext == '.pdf':
-            return PDFProcessor()
-        elif ext == '.docx':
-            return DocxProcessor()
-        elif ext == '.txt':
-            return TxtProcessor()
-        else:
-            raise ValueError(f"Unsupported file format: {ext}")
\ No newline at end of file
+        return _get_processor(ext)
+
+_processors: Dict[str, BaseDocumentProcessor] = {}
+_processors_lock = threading.Lock()
+
+def _get_processor(ext: str) -> BaseDocumentProcessor:
+    """Create the processor for a file extension once and reuse it."""
+    with _processors_lock:
+        processor = _processors.get(ext)
+        if processor is None:
+            processor = _create_processor(ext)
+            _processors[ext] = processor
+        return processor
+
+def close_processors() -> None:
+    """Close the shared processors; later calls create new ones."""
+    with _processors_lock:
+        processors = list(_processors.values())
+        _processors.clear()
+    
+    for processor in processors:
+        try:
+            processor.close()
+        except Exception as e:
+            logger.warning(f"Error closing {processor.__class__.__name__}: {e}")
+
+def _create_processor(ext: str) -> BaseDocumentProcessor:
+    """Create the processor for a file extension."""
+    from .pdf_processor import PDFProcessor
+    from .docx_processor import DocxProcessor
+    from .txt_processor import TxtProcessor
+    
+    if ext == '.pdf':
+        return PDFProcessor()
+    elif ext == '.docx':
+        return DocxProcessor()
+    elif ext == '.txt':
+        return TxtProcessor()
+    else:
+        raise ValueError(f"Unsupported file format: {ext}")
\ No newline at end of file
@@ -1,9 +1,41 @@
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 import logging
+from functools import lru_cache
+
+from .processor import pages_for_range
 
 logger = logging.getLogger(__name__)
 
+_PAGE_RE = re.compile(r"---\s+Page\s+(\d+)\s+---")
+_NON_SPACE_RE = re.compile(r"\S")
+
+_DEFAULT_HEADING_PATTERNS = (
+    r"^#{1,6}\s+.+$", 
+    r"^(?:Section|Chapter|Part)\s+\d+:?\s+.+$",  
+    r"^---\s+Page\s+\d+\s+---$",  
+    r"^[A-Z][^.!?]*(?:[.!?]|$)"  
+)
+
+@lru_cache(maxsize=32)
+def _compile_boundaries(heading_patterns: Tuple[str, ...], paragraph_separator: str) -> Tuple[re.Pattern, re.Pattern]:
+    """
+    Compile the heading and boundary regexes for a set of heading patterns.
+    Cached so chunkers with the same patterns (e.g. the parent and child chunkers
+    of every HierarchicalChunker) share one compiled pair.
+    """
+    heading_regex = re.compile("|".join(heading_patterns), re.MULTILINE)
+    
+    # Paragraph separators and heading starts in one pattern, so the whole text is
+    # split in a single scan. Headings are matched in a lookahead: they start a new
+    # unit but stay part of it.
+    boundary_regex = re.compile(
+        f"{re.escape(paragraph_separator)}|(?=(?P<heading>{'|'.join(heading_patterns)}))",
+        re.MULTILINE
+    )
+    
+    return heading_regex, boundary_regex
+
 class SemanticChunker:
     """
     Chunks text based on semantic boundaries (paragraphs, sections, headings)
@@ -34,20 +66,18 @@ class SemanticChunker:
         self.paragraph_separator = paragraph_separator
         
         if heading_patterns is None:
-            self.heading_patterns = [
-                r"^#{1,6}\s+.+$", 
-                r"^(?:Section|Chapter|Part)\s+\d+:?\s+.+$",  
-                r"^---\s+Page\s+\d+\s+---$",  
-                r"^[A-Z][^.!?]*(?:[.!?]|$)"  
-            ]
+            self.heading_patterns = list(_DEFAULT_HEADING_PATTERNS)
         else:
             self.heading_patterns = heading_patterns
             
-        self.heading_regex = re.compile("|".join(self.heading_patterns), re.MULTILINE)
+        self.heading_regex, self.boundary_regex = _compile_boundaries(
+            tuple(self.heading_patterns), self.paragraph_separator
+        )
         
     def _split_by_semantic_boundaries(self, text: str) -> List[str]:
         """
         Split text by paragraphs and headings to maintain semantic context.
+        Each heading starts a unit that runs until the next heading or paragraph break.
         
         Args:
             text: Input text
@@ -55,36 +85,50 @@ class SemanticChunker:
         Returns:
             List of semantic units (paragraphs, sections)
         """
-      
-        paragraphs = text.split(self.paragraph_separator)
+        return [text[start:end] for start, end in self._unit_spans(text)]
+    
+    def _unit_spans(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Find the semantic units of text as (start, end) offsets, with surrounding
+        whitespace excluded and blank units dropped.
         
-        semantic_units = []
-        for paragraph in paragraphs:
-            if not paragraph.strip():
-                continue
+        Args:
+            text: Input text
+            
+        Returns:
+            List of (start, end) offsets of the semantic units
+        """
+        boundaries = []
+        unit_start = 0
+        heading_end = 0
         
-            heading_matches = list(self.heading_regex.finditer(paragraph))
+        for match in self.boundary_regex.finditer(text):
+            if match.group("heading") is None:
+                boundaries.append((unit_start, match.start()))
+                unit_start = match.end()
+                heading_end = 0
+                continue
             
-            if not heading_matches:
-                semantic_units.append(paragraph)
+            # Skip matches that begin inside the previous heading
+            if match.start() < heading_end:
                 continue
-                
-            last_end = 0
-            for match in heading_matches:
-                if match.start() > last_end:
-                    unit = paragraph[last_end:match.start()].strip()
-                    if unit:
-                        semantic_units.append(unit)
-                
-                if match.end() < len(paragraph):
-                    unit = paragraph[match.start():].strip()
-                    semantic_units.append(unit)
-                else:
-                    unit = paragraph[match.start():match.end()].strip()
-                    semantic_units.append(unit)
-                last_end = match.end()
+            
+            boundaries.append((unit_start, match.start()))
+            unit_start = match.start()
+            heading_end = match.end("heading")
         
-        return [unit for unit in semantic_units if unit.strip()]
+        boundaries.append((unit_start, len(text)))
+        
+        spans = []
+        for start, end in boundaries:
+            # Blank units have no non-whitespace character
+            first_char = _NON_SPACE_RE.search(text, start, end)
+            if first_char is None:
+                continue
+            start = first_char.start()
+            spans.append((start, start + len(text[start:end].rstrip())))
+        
+        return spans
         
     def _merge_small_units(self, units: List[str]) -> List[str]:
         """
@@ -96,27 +140,45 @@ class SemanticChunker:
         Returns:
             List of merged units
         """
-        merged_units = []
-        current_unit = ""
+        separator = self.paragraph_separator
+        return [separator.join(units[first:last]) for first, last in self._group_units(units)]
+    
+    def _group_units(self, units: List[str]) -> List[Tuple[int, int]]:
+        """
+        Group consecutive semantic units into chunks of at most max_chunk_size.
+        
+        Args:
+            units: List of semantic units
+            
+        Returns:
+            List of (first, last) unit index ranges, last exclusive
+        """
+        separator_len = len(self.paragraph_separator)
+        groups = []
+        group_start = 0
+        buffer_len = 0
         
-        for unit in units:
-            if len(current_unit) + len(unit) > self.max_chunk_size and current_unit:
-                merged_units.append(current_unit)
-                current_unit = unit
+        for i, unit in enumerate(units):
+            unit_len = len(unit)
+            if i > group_start and buffer_len + unit_len > self.max_chunk_size:
+                groups.append((group_start, i))
+                group_start = i
+                buffer_len = unit_len
             else:
-                if current_unit:
-                    current_unit += self.paragraph_separator
-                current_unit += unit
+                if i > group_start:
+                    buffer_len += separator_len
+                buffer_len += unit_len
         
-        if current_unit:
-            merged_units.append(current_unit)
+        if group_start < len(units):
+            groups.append((group_start, len(units)))
             
-        return merged_units
+        return groups
     
     def create_chunks(
         self, 
         text: str, 
-        metadata: Dict[str, Any] = None
+        metadata: Dict[str, Any] = None,
+        page_spans: Optional[List[Tuple[int, int, int]]] = None
     ) -> List[Dict[str, Any]]:
         """
         Create chunks from text with metadata.
@@ -124,51 +186,84 @@ class SemanticChunker:
         Args:
             text: Input text
             metadata: Metadata to include with each chunk
+            page_spans: Optional (start, end, page number) of each page of text
             
         Returns:
             List of chunks with text and metadata
         """
+        chunks = list(self.iter_chunks(text, metadata, page_spans))
+            
+        logger.info(f"Created {len(chunks)} semantic chunks from text with {len(text)} characters")
+        return chunks
+    
+    def iter_chunks(
+        self, 
+        text: str, 
+        metadata: Dict[str, Any] = None,
+        page_spans: Optional[List[Tuple[int, int, int]]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield chunks from text with metadata one at a time, so a streaming consumer
+        never holds every overlap-expanded chunk in memory at once.
+        
+        Pages come from page_spans when given (as tracked by the document
+        processors), and otherwise from "--- Page N ---" markers in the text.
+        
+        Args:
+            text: Input text
+            metadata: Metadata to include with each chunk
+            page_spans: Optional (start, end, page number) of each page of text
+            
+        Returns:
+            Iterator of chunks with text and metadata
+        """
         if metadata is None:
             metadata = {}
             
-        semantic_units = self._split_by_semantic_boundaries(text)
-        merged_units = self._merge_small_units(semantic_units)
+        unit_spans = self._unit_spans(text)
+        semantic_units = [text[start:end] for start, end in unit_spans]
+        groups = self._group_units(semantic_units)
+        merged_units = [self.paragraph_separator.join(semantic_units[first:last]) for first, last in groups]
         
-        chunks = []
+        if page_spans:
+            span_starts = [span[0] for span in page_spans]
+        
+        overlap_size = self.overlap_size
+        separator = self.paragraph_separator
+        total_chunks = len(merged_units)
+        last_index = total_chunks - 1
         
         for i, unit in enumerate(merged_units):
-            chunk_metadata = metadata.copy()
-            
-            chunk_metadata["chunk_index"] = i
-            chunk_metadata["total_chunks"] = len(merged_units)
+            chunk_metadata = {**metadata, "chunk_index": i, "total_chunks": total_chunks}
             
-            page_numbers = []
-            page_pattern = re.compile(r"---\s+Page\s+(\d+)\s+---")
-            for match in page_pattern.finditer(unit):
-                page_numbers.append(int(match.group(1)))
+            # Pages come from the unit itself, not the context borrowed from its neighbours
+            if page_spans:
+                first, last = groups[i]
+                page_numbers = pages_for_range(page_spans, span_starts, unit_spans[first][0], unit_spans[last - 1][1])
+            else:
+                page_numbers = [int(match.group(1)) for match in _PAGE_RE.finditer(unit)]
             
             if page_numbers:
                 chunk_metadata["pages"] = page_numbers
                 chunk_metadata["page"] = page_numbers[0]
             
-            if i > 0 and self.overlap_size > 0:
-                prev_text = merged_units[i-1]
-                if len(prev_text) > self.overlap_size:
-                    prev_text = prev_text[-self.overlap_size:]
-                unit = prev_text + self.paragraph_separator + unit
-                chunk_metadata["has_previous_context"] = True
-            
-            if i < len(merged_units) - 1 and self.overlap_size > 0:
-                next_text = merged_units[i+1]
-                if len(next_text) > self.overlap_size:
-                    next_text = next_text[:self.overlap_size]
-                unit = unit + self.paragraph_separator + next_text
-                chunk_metadata["has_next_context"] = True
+            if overlap_size > 0 and total_chunks > 1:
+                parts = []
+                if i > 0:
+                    parts.append(merged_units[i-1][-overlap_size:])
+                    parts.append(separator)
+                    chunk_metadata["has_previous_context"] = True
+                
+                parts.append(unit)
+                
+                if i < last_index:
+                    parts.append(separator)
+                    parts.append(merged_units[i+1][:overlap_size])
+                    chunk_metadata["has_next_context"] = True
                 
-            chunks.append({
+                unit = "".join(parts)
+                
+            yield {
                 "text": unit,
                 "metadata": chunk_metadata
-            })
-            
-        logger.info(f"Created {len(chunks)} semantic chunks from text with {len(text)} characters")
-        return chunks
\ No newline at end of file
+            }
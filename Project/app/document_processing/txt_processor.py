@@ -1,23 +1,18 @@
 import os
 import logging
 from typing import Dict, List, Any, Optional
-import re
+import codecs
+import mmap
 import chardet
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from chardet.universaldetector import UniversalDetector
 
-from .processor import BaseDocumentProcessor, Document, DocumentChunk
-from ..core.config import settings
+from .processor import BaseDocumentProcessor, Document, DocumentChunk, cache_chunks
 
 logger = logging.getLogger(__name__)
 
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
 class TxtProcessor(BaseDocumentProcessor):
-    def __init__(self):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.CHUNK_SIZE,
-            chunk_overlap=settings.CHUNK_OVERLAP,
-            length_function=len
-        )
-    
     def process(self, file_path: str) -> Document:
         """
         Process a TXT file and extract text and metadata.
@@ -33,15 +28,15 @@ class TxtProcessor(BaseDocumentProcessor):
         try:
        
             with open(file_path, 'rb') as file:
-                raw_data = file.read()
-                encoding_result = chardet.detect(raw_data)
-                encoding = encoding_result['encoding']
-            
-            
-            with open(file_path, 'r', encoding=encoding) as file:
-                text_content = file.read()
-        
-            file_stats = os.stat(file_path)
+                file_stats = os.fstat(file.fileno())
+                
+                # Decode straight from a memory map so the raw bytes are never copied
+                # onto the heap next to the decoded text.
+                if file_stats.st_size:
+                    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as raw_data:
+                        text_content = self._decode(raw_data)
+                else:
+                    text_content = ""
             
    
             doc_metadata = {
@@ -52,25 +47,106 @@ class TxtProcessor(BaseDocumentProcessor):
                 "creation_date": str(file_stats.st_ctime),
                 "modification_date": str(file_stats.st_mtime),
             }
-
-            chars_per_page = 3000
-            page_count = max(1, len(text_content) // chars_per_page)
-            doc_metadata["page_count"] = page_count
-            
-         
-            processed_text = ""
-            for i in range(page_count):
-                start_idx = i * chars_per_page
-                end_idx = min((i + 1) * chars_per_page, len(text_content))
-                page_text = text_content[start_idx:end_idx]
-                processed_text += f"--- Page {i+1} ---\n{page_text}\n\n"
             
-            return Document(processed_text, doc_metadata)
+            return self._paginate(text_content, doc_metadata)
             
         except Exception as e:
             logger.error(f"Error processing TXT file: {e}")
             raise
     
+    def process_text(self, text: str, source: str) -> Document:
+        """
+        Build a Document from text already in memory, without going through a file.
+        
+        Args:
+            text: Text content of the document
+            source: Name to record as the document's source
+            
+        Returns:
+            Document: A Document object with the text and metadata
+        """
+        logger.info(f"Processing TXT text: {source}")
+        
+        doc_metadata = {
+            "source": source,
+            "file_type": "txt",
+        }
+        
+        return self._paginate(text, doc_metadata)
+    
+    def _paginate(self, text_content: str, doc_metadata: Dict[str, Any]) -> Document:
+        """
+        Split text into estimated pages and wrap it in a Document.
+        
+        Args:
+            text_content: Text content of the document
+            doc_metadata: Document metadata; page_count is added to it
+            
+        Returns:
+            Document: A Document object with the text, metadata and page spans
+        """
+        chars_per_page = 3000
+        page_count = max(1, len(text_content) // chars_per_page)
+        doc_metadata["page_count"] = page_count
+        
+        # Pages are fixed-size slices of the text; the last page takes the remainder
+        page_spans = [
+            (i * chars_per_page, (i + 1) * chars_per_page if i < page_count - 1 else len(text_content), i + 1)
+            for i in range(page_count)
+        ]
+        
+        return Document(text_content, doc_metadata, page_spans)
+    
+    def _decode(self, raw_data: "bytes | mmap.mmap") -> str:
+        """
+        Decode file contents, detecting the encoding from a prefix of the file.
+        Like reading the file in text mode, a UTF-8 BOM is dropped and line
+        endings (CRLF, CR) are normalized to LF.
+        
+        Args:
+            raw_data: Raw file contents, as bytes or a memory map
+            
+        Returns:
+            str: Decoded text
+        """
+        return self._decode_raw(raw_data).replace('\r\n', '\n').replace('\r', '\n')
+    
+    def _decode_raw(self, raw_data: "bytes | mmap.mmap") -> str:
+        """Decode file contents as-is, detecting the encoding from a prefix of the file."""
+        sample = raw_data[:ENCODING_SAMPLE_SIZE]
+        
+        if sample.startswith(codecs.BOM_UTF8):
+            encoding = 'utf-8-sig'
+        else:
+            try:
+                # Most files are UTF-8; the incremental decoder tolerates a character
+                # cut off at the end of the sample.
+                codecs.getincrementaldecoder('utf-8')().decode(sample)
+                encoding = 'utf-8'
+            except UnicodeDecodeError:
+                encoding = chardet.detect(sample)['encoding']
+        
+        try:
+            return str(raw_data, encoding or 'utf-8')
+        except (UnicodeDecodeError, LookupError):
+            encoding = self._detect_encoding(raw_data)
+            logger.info(f"Encoding guessed from sample did not fit the whole file, using {encoding}")
+            return str(raw_data, encoding or 'utf-8', errors='replace')
+    
+    def _detect_encoding(self, raw_data: "bytes | mmap.mmap") -> Optional[str]:
+        """
+        Detect the encoding of the whole file, feeding it to chardet a slice at a
+        time so a memory-mapped file is never copied in full.
+        """
+        detector = UniversalDetector()
+        for start in range(0, len(raw_data), ENCODING_SAMPLE_SIZE):
+            detector.feed(raw_data[start:start + ENCODING_SAMPLE_SIZE])
+            if detector.done:
+                break
+        detector.close()
+        return detector.result['encoding']
+    
+    @cache_chunks
     def chunk(self, document: Document) -> List[DocumentChunk]:
         """
         Split a document into chunks for embedding.
@@ -84,41 +160,7 @@ class TxtProcessor(BaseDocumentProcessor):
         logger.info(f"Chunking document: {document.metadata.get('source', 'unknown')}")
         
         try:
-
-            chunks = self.text_splitter.split_text(document.text)
-            
-      
-            doc_chunks = []
-            for i, chunk_text in enumerate(chunks):
-         
-                page_numbers = []
-                page_pattern = re.compile(r"--- Page (\d+) ---")
-                for match in page_pattern.finditer(chunk_text):
-                    page_numbers.append(int(match.group(1)))
-                
-          
-                if not page_numbers:
-            
-                    total_length = len(document.text)
-                    chunk_start = document.text.find(chunk_text)
-                    relative_position = chunk_start / total_length if total_length > 0 else 0
-                    estimated_page = max(1, min(
-                        round(relative_position * document.metadata.get("page_count", 1)), 
-                        document.metadata.get("page_count", 1)
-                    ))
-                    page_numbers = [estimated_page]
-                
-             
-                chunk_metadata = document.metadata.copy()
-                chunk_metadata.update({
-                    "chunk_id": i,
-                    "pages": page_numbers,
-                    "page": page_numbers[0] if page_numbers else 1,  
-                })
-                
-                doc_chunks.append(DocumentChunk(chunk_text, chunk_metadata))
-            
-            return doc_chunks
+            return self.chunk_text_with_spans(document)
             
         except Exception as e:
             logger.error(f"Error chunking document: {e}")
@@ -0,0 +1,122 @@
+from typing import List, Optional
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of parameters in one statement
+_LOOKUP_BATCH_SIZE = 500
+
+class EmbeddingCache:
+    """
+    Persistent cache of text embeddings in a SQLite database.
+    Vectors are stored as raw float32 bytes, keyed by a SHA-256 of the model
+    identifier and the text, so the same text embedded by another model never hits.
+    Beyond max_rows entries the oldest writes are evicted. The row count is
+    tracked in memory, so processes sharing the file may overshoot max_rows by
+    what the others wrote since they opened it.
+    """
+
+    def __init__(self, path: str, model_id: str, max_rows: int = 100000):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            path: Path to the SQLite database file
+            model_id: Identifies the model producing the embeddings
+            max_rows: Maximum number of embeddings kept in the database
+        """
+        self.path = path
+        self.model_id = model_id
+        self.max_rows = max_rows
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Embedding calls run on several worker threads; they share one connection
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(hash BLOB PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL)"
+            )
+            # Counted once here and kept up to date by put_many, not on every write
+            (self._row_count,) = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+        logger.info(f"Opened embedding cache at {path} for model: {model_id}")
+
+    def _key(self, text: str) -> bytes:
+        """Build the cache key for a text."""
+        return hashlib.sha256(f"{self.model_id}\0{text}".encode("utf-8", "surrogatepass")).digest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up the embeddings of several texts.
+
+        Args:
+            texts: Texts to look up
+
+        Returns:
+            List[Optional[np.ndarray]]: Embedding for each text, or None where missing
+        """
+        keys = [self._key(text) for text in texts]
+        found = {}
+
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_BATCH_SIZE):
+                batch = keys[start:start + _LOOKUP_BATCH_SIZE]
+                rows = self._connection.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE hash IN ({','.join('?' * len(batch))})",
+                    batch
+                )
+                found.update(rows)
+
+        return [
+            np.frombuffer(found[key], dtype=np.float32) if key in found else None
+            for key in keys
+        ]
+
+    def put_many(self, texts: List[str], embeddings: np.ndarray) -> None:
+        """
+        Store the embeddings of several texts.
+
+        Args:
+            texts: Texts that were embedded
+            embeddings: Embedding matrix, one row per text
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        rows = [
+            (self._key(text), self.model_id, embedding.tobytes())
+            for text, embedding in zip(texts, embeddings)
+        ]
+
+        with self._lock, self._connection:
+            # A text already stored has the same embedding, so existing rows are kept;
+            # the row count then only grows by the rows actually inserted
+            inserted = self._connection.executemany(
+                "INSERT OR IGNORE INTO embeddings (hash, model, vector) VALUES (?, ?, ?)",
+                rows
+            ).rowcount
+            self._row_count += inserted
+
+            # Rowids only grow, so the lowest rowids are the oldest writes
+            if self._row_count > self.max_rows:
+                evicted = self._connection.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY rowid LIMIT ?)",
+                    (self._row_count - self.max_rows,)
+                ).rowcount
+                self._row_count -= evicted
+
+    def close(self) -> None:
+        """Close the database connection, checkpointing the WAL into the database."""
+        with self._lock:
+            self._connection.close()
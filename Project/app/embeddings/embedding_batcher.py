@@ -0,0 +1,107 @@
+from typing import List, Optional, Tuple
+import asyncio
+import logging
+import numpy as np
+from concurrent.futures import Executor
+
+from .embedding_provider import BaseEmbeddingProvider, embed_unique
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingBatcher:
+    """
+    Coalesces embedding requests from concurrent callers into shared
+    provider calls, so many small uploads share one model forward pass.
+    """
+
+    def __init__(self, provider: BaseEmbeddingProvider, max_batch_size: int = 64,
+                 max_wait: float = 0.01, executor: Optional[Executor] = None):
+        """
+        Initialize the batcher.
+
+        Args:
+            provider: Embedding provider used for the combined batches
+            max_batch_size: Number of texts after which a batch is dispatched
+            max_wait: Seconds to wait for more requests before dispatching
+            executor: Executor the blocking provider call runs on
+        """
+        self.provider = provider
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.executor = executor
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts, batching them with other pending requests.
+
+        Args:
+            texts: List of text strings to embed
+
+        Returns:
+            np.ndarray: Embedding matrix with rows in the same order as texts
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        self._ensure_worker()
+
+        future = self._loop.create_future()
+        await self._queue.put((texts, future))
+        return await future
+
+    def _ensure_worker(self) -> None:
+        """Start the batching task on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Collect pending requests into batches and embed them."""
+        while True:
+            pending = [await self._queue.get()]
+            batch_size = len(pending[0][0])
+            deadline = self._loop.time() + self.max_wait
+
+            while batch_size < self.max_batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                batch_size += len(item[0])
+
+            await self._dispatch(pending)
+
+    async def _dispatch(self, pending: List[Tuple[List[str], asyncio.Future]]) -> None:
+        """Embed one combined batch and hand each caller its slice."""
+        texts = [text for request_texts, _ in pending for text in request_texts]
+
+        try:
+            embeddings = await self._loop.run_in_executor(
+                self.executor, embed_unique, self.provider, texts
+            )
+        except Exception as e:
+            logger.error(f"Error generating batched embeddings: {e}")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        logger.info(f"Embedded {len(texts)} texts for {len(pending)} requests in one batch")
+
+        start = 0
+        for request_texts, future in pending:
+            end = start + len(request_texts)
+            if not future.done():
+                future.set_result(embeddings[start:end])
+            start = end
@@ -1,11 +1,19 @@
 from typing import List, Dict, Any, Optional, Union
 import logging
 import numpy as np
+import torch
+import httpx
 from abc import ABC, abstractmethod
 from sentence_transformers import SentenceTransformer
 import os
+import json
 import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 
+from .cache import EmbeddingCache
 from ..core.config import settings
 from ..document_processing.processor import DocumentChunk
 
@@ -15,7 +23,7 @@ class BaseEmbeddingProvider(ABC):
     """Abstract base class for embedding providers."""
     
     @abstractmethod
-    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for a list of texts.
         
@@ -23,29 +31,48 @@ class BaseEmbeddingProvider(ABC):
             texts: List of text strings to embed
             
         Returns:
-            List[List[float]]: List of embedding vectors
+            np.ndarray: float32 matrix with one embedding vector per row
         """
         pass
+    
+    def warm_up(self) -> None:
+        """Embed a dummy text so lazy initialization happens before the first real request."""
+        self.get_embeddings(["warmup"])
 
 class LocalEmbeddingProvider(BaseEmbeddingProvider):
     """Embedding provider using local sentence-transformers models."""
     
-    def __init__(self, model_name: str = settings.EMBEDDING_MODEL):
+    def __init__(self, model_name: str = settings.EMBEDDING_MODEL,
+                 batch_size: int = settings.EMBEDDING_BATCH_SIZE):
         """
         Initialize the embedding provider with a specific model.
         
         Args:
             model_name: Name or path of the sentence-transformers model
+            batch_size: Number of texts per model forward pass
         """
         self.model_name = model_name
+        self.batch_size = batch_size
+        
         try:
-            self.model = SentenceTransformer(model_name)
-            logger.info(f"Loaded embedding model: {model_name}")
+            self.model = self._load_model(model_name)
         except Exception as e:
             logger.error(f"Error loading embedding model {model_name}: {e}")
             raise
     
-    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def _load_model(self, model_name: str) -> Any:
+        """Load the sentence-transformers model, in half precision on GPU."""
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model = SentenceTransformer(model_name, device=device)
+        
+        # Half precision halves memory traffic on GPU; CPUs keep float32
+        if device == "cuda":
+            model.half()
+        
+        logger.info(f"Loaded embedding model: {model_name} on {device}")
+        return model
+    
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for a list of texts.
         
@@ -53,17 +80,363 @@ class LocalEmbeddingProvider(BaseEmbeddingProvider):
             texts: List of text strings to embed
             
         Returns:
-            List[List[float]]: List of embedding vectors
+            np.ndarray: float32 matrix with one embedding vector per row
         """
         try:
-           
-            embeddings = self.model.encode(texts, normalize_embeddings=True)
-
-            return embeddings.tolist()
+            return self._encode(texts)
             
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
             raise
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run the model over texts, returning a float32 matrix."""
+        # encode() sorts texts by length before batching, so each batch pads to
+        # similar lengths, and restores the input order afterwards.
+        with torch.inference_mode():
+            embeddings = self.model.encode(
+                texts,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+        
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+class OnnxEmbeddingProvider(LocalEmbeddingProvider):
+    """
+    Embedding provider running an INT8-quantized export of a sentence-transformers
+    model with ONNX Runtime, for CPU deployments. Needs optimum[onnxruntime].
+    """
+    
+    QUANTIZED_FILE_NAME = "model_quantized.onnx"
+    
+    def __init__(self, model_name: str = settings.EMBEDDING_MODEL,
+                 batch_size: int = settings.EMBEDDING_BATCH_SIZE,
+                 model_dir: str = settings.EMBEDDING_MODEL_ONNX):
+        """
+        Initialize the ONNX embedding provider.
+        
+        Args:
+            model_name: Name or path of the sentence-transformers model
+            batch_size: Number of texts per model forward pass
+            model_dir: Directory holding the quantized model; it is exported and
+                quantized there on first use
+        """
+        self.model_dir = model_dir
+        super().__init__(model_name, batch_size=batch_size)
+    
+    def _load_model(self, model_name: str) -> Any:
+        """Load the quantized model, exporting and quantizing it if needed."""
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+        
+        if not os.path.exists(os.path.join(self.model_dir, self.QUANTIZED_FILE_NAME)):
+            self._export_quantized(model_name)
+        
+        with open(os.path.join(self.model_dir, "pooling.json")) as pooling_file:
+            pooling = json.load(pooling_file)
+        self.pooling_mode = pooling["mode"]
+        self.max_seq_length = pooling["max_seq_length"]
+        
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+        model = ORTModelForFeatureExtraction.from_pretrained(self.model_dir, file_name=self.QUANTIZED_FILE_NAME)
+        
+        logger.info(f"Loaded quantized ONNX embedding model: {model_name} from {self.model_dir}")
+        return model
+    
+    def _export_quantized(self, model_name: str) -> None:
+        """Export the model to ONNX and apply dynamic INT8 quantization."""
+        from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+        
+        logger.info(f"Exporting {model_name} to a quantized ONNX model in {self.model_dir}")
+        
+        # The pooling the sentence-transformers model was trained with (CLS for BGE,
+        # mean for most others) has to be reproduced on the raw transformer output
+        sentence_model = SentenceTransformer(model_name, device="cpu")
+        pooling_module = sentence_model[1]
+        pooling = {
+            "mode": "cls" if pooling_module.pooling_mode_cls_token else "mean",
+            "max_seq_length": sentence_model.max_seq_length
+        }
+        transformer_path = sentence_model[0].auto_model.name_or_path
+        del sentence_model
+        
+        onnx_model = ORTModelForFeatureExtraction.from_pretrained(transformer_path, export=True)
+        quantizer = ORTQuantizer.from_pretrained(onnx_model)
+        quantization_config = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=True)
+        quantizer.quantize(save_dir=self.model_dir, quantization_config=quantization_config)
+        
+        AutoTokenizer.from_pretrained(transformer_path).save_pretrained(self.model_dir)
+        with open(os.path.join(self.model_dir, "pooling.json"), "w") as pooling_file:
+            json.dump(pooling, pooling_file)
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run the quantized model over texts, returning normalized float32 embeddings."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        
+        # Batch texts of similar length together, as SentenceTransformer.encode does
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        embeddings = None
+        
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            inputs = self.tokenizer(
+                [texts[i] for i in batch],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            hidden_states = np.asarray(self.model(**inputs).last_hidden_state, dtype=np.float32)
+            
+            if self.pooling_mode == "cls":
+                pooled = hidden_states[:, 0]
+            else:
+                mask = inputs["attention_mask"][..., np.newaxis].astype(np.float32)
+                pooled = (hidden_states * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            
+            if embeddings is None:
+                embeddings = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            embeddings[batch] = pooled
+        
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings
+
+class OllamaEmbeddingProvider(BaseEmbeddingProvider):
+    """Embedding provider using an embedding model served by Ollama."""
+    
+    def __init__(self, model_name: str = settings.EMBEDDING_MODEL,
+                 base_url: str = settings.OLLAMA_BASE_URL,
+                 batch_size: int = settings.EMBEDDING_BATCH_SIZE):
+        """
+        Initialize the Ollama embedding provider.
+        
+        Args:
+            model_name: Name of the Ollama embedding model
+            base_url: Base URL for Ollama API
+            batch_size: Number of texts sent per request
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.api_endpoint = f"{base_url}/api/embed"
+        self.client = httpx.Client(timeout=httpx.Timeout(120.0, connect=10.0))
+        
+        logger.info(f"Initialized Ollama embedding provider with model: {model_name}")
+    
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for a list of texts.
+        /api/embed takes a list of inputs, so each batch of texts is one request.
+        
+        Args:
+            texts: List of text strings to embed
+            
+        Returns:
+            np.ndarray: float32 matrix with one embedding vector per row
+        """
+        try:
+            embeddings = []
+            for start in range(0, len(texts), self.batch_size):
+                response = self.client.post(
+                    self.api_endpoint,
+                    json={"model": self.model_name, "input": texts[start:start + self.batch_size]}
+                )
+                response.raise_for_status()
+                embeddings.extend(response.json()["embeddings"])
+            
+            return np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1 if texts else 0)
+            
+        except Exception as e:
+            logger.error(f"Error generating embeddings from Ollama: {e}")
+            raise
+
+class CachedEmbeddingProvider(BaseEmbeddingProvider):
+    """
+    Wraps an embedding provider with a persistent embedding cache, so texts
+    embedded in an earlier run skip the provider entirely.
+    """
+    
+    def __init__(self, provider: BaseEmbeddingProvider, cache: EmbeddingCache):
+        """
+        Initialize the cached provider.
+        
+        Args:
+            provider: Provider used for texts missing from the cache
+            cache: Persistent embedding cache
+        """
+        self.provider = provider
+        self.cache = cache
+    
+    def __getattr__(self, name: str) -> Any:
+        # Expose the wrapped provider's attributes (model_name, cache_info, ...). The provider is read
+        # from __dict__: before __init__ sets it (e.g. while copy or pickle rebuild
+        # the object) self.provider would call __getattr__ again, without end.
+        provider = self.__dict__.get("provider")
+        if provider is None:
+            raise AttributeError(name)
+        return getattr(provider, name)
+    
+    def warm_up(self) -> None:
+        """Warm up the wrapped provider; the dummy text is not written to the cache."""
+        self.provider.warm_up()
+    
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for a list of texts, reading cached ones from disk.
+        
+        Args:
+            texts: List of text strings to embed
+            
+        Returns:
+            np.ndarray: float32 matrix with one embedding vector per row
+        """
+        try:
+            cached = self.cache.get_many(texts)
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+            return self.provider.get_embeddings(texts)
+        
+        misses = [i for i, embedding in enumerate(cached) if embedding is None]
+        if not misses:
+            return np.vstack(cached) if cached else self.provider.get_embeddings(texts)
+        
+        encoded = self.provider.get_embeddings([texts[i] for i in misses])
+        
+        try:
+            self.cache.put_many([texts[i] for i in misses], encoded)
+        except Exception as e:
+            logger.warning(f"Could not write embeddings to cache: {e}")
+        
+        if len(misses) == len(texts):
+            return encoded
+        
+        embeddings = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+        for i, embedding in enumerate(cached):
+            if embedding is not None:
+                embeddings[i] = embedding
+        embeddings[misses] = encoded
+        return embeddings
+
+class MemoryCachedEmbeddingProvider(BaseEmbeddingProvider):
+    """
+    Wraps an embedding provider with an in-memory LRU cache, so repeated chunks
+    skip the provider (and any persistent cache behind it) entirely.
+    """
+    
+    def __init__(self, provider: BaseEmbeddingProvider, cache_size: int = settings.EMBED_CACHE_SIZE):
+        """
+        Initialize the memory-cached provider.
+        
+        Args:
+            provider: Provider used for texts missing from the cache
+            cache_size: Number of text embeddings kept in memory
+        """
+        self.provider = provider
+        self.cache_size = cache_size
+        
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    def __getattr__(self, name: str) -> Any:
+        # Expose the wrapped provider's attributes (model_name, ...). The provider is read
+        # from __dict__: before __init__ sets it (e.g. while copy or pickle rebuild
+        # the object) self.provider would call __getattr__ again, without end.
+        provider = self.__dict__.get("provider")
+        if provider is None:
+            raise AttributeError(name)
+        return getattr(provider, name)
+    
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for a list of texts, reusing recently embedded ones.
+        
+        Args:
+            texts: List of text strings to embed
+            
+        Returns:
+            np.ndarray: float32 matrix with one embedding vector per row
+        """
+        keys = [hashlib.sha1(text.encode("utf-8", "surrogatepass")).digest() for text in texts]
+        cached = [None] * len(texts)
+        
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                embedding = self._cache.get(key)
+                if embedding is not None:
+                    self._cache.move_to_end(key)
+                    cached[i] = embedding
+        
+        misses = [i for i, embedding in enumerate(cached) if embedding is None]
+        
+        with self._cache_lock:
+            self.cache_hits += len(texts) - len(misses)
+            self.cache_misses += len(misses)
+        
+        if not misses:
+            return np.vstack(cached) if cached else self.provider.get_embeddings(texts)
+        
+        encoded = self.provider.get_embeddings([texts[i] for i in misses])
+        if len(misses) == len(texts):
+            embeddings = encoded
+        else:
+            embeddings = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+            for i, embedding in enumerate(cached):
+                if embedding is not None:
+                    embeddings[i] = embedding
+            embeddings[misses] = encoded
+        
+        with self._cache_lock:
+            for i, embedding in zip(misses, encoded):
+                # Copy the row so the cache doesn't keep the whole batch alive
+                self._cache[keys[i]] = embedding.copy()
+                self._cache.move_to_end(keys[i])
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        
+        return embeddings
+    
+    def warm_up(self) -> None:
+        """Warm up the wrapped provider; the dummy text is not cached."""
+        self.provider.warm_up()
+    
+    def cache_info(self) -> Dict[str, int]:
+        """Hit and miss counts of the in-memory embedding cache."""
+        with self._cache_lock:
+            return {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "size": len(self._cache),
+                "max_size": self.cache_size
+            }
+
+def embed_unique(provider: BaseEmbeddingProvider, texts: List[str]) -> np.ndarray:
+    """
+    Embed texts, running each distinct text through the provider only once.
+    Repeated headers, footers and boilerplate often produce identical chunks.
+    
+    Args:
+        provider: Embedding provider to use
+        texts: List of text strings to embed
+        
+    Returns:
+        np.ndarray: float32 matrix with one embedding vector per input text
+    """
+    positions: Dict[str, int] = {}
+    inverse = [positions.setdefault(text, len(positions)) for text in texts]
+    
+    if len(positions) == len(texts):
+        return provider.get_embeddings(texts)
+    
+    logger.info(f"Embedding {len(positions)} distinct texts out of {len(texts)}")
+    unique_embeddings = provider.get_embeddings(list(positions))
+    return unique_embeddings[inverse]
 
 class EmbeddingService:
     """Service for managing document embeddings."""
@@ -73,10 +446,64 @@ class EmbeddingService:
         self.provider_type = settings.EMBEDDING_PROVIDER
         
         if self.provider_type == "local":
-            self.provider = LocalEmbeddingProvider()
+            base_provider = LocalEmbeddingProvider()
+        elif self.provider_type == "onnx":
+            base_provider = OnnxEmbeddingProvider()
+        elif self.provider_type == "ollama":
+            base_provider = OllamaEmbeddingProvider()
         else:
             # Placeholder for other providers (OpenAI, etc.)
             raise ValueError(f"Unsupported embedding provider: {self.provider_type}")
+        
+        # Queries go straight to the model: they are cached per instance below and
+        # are never written to disk
+        self.query_provider = base_provider
+        
+        # Chunks are looked up in memory first, then in the persistent cache
+        self.provider = base_provider
+        self.embedding_cache = None
+        if settings.EMBEDDING_CACHE_PATH:
+            model_id = f"{self.provider_type}:{base_provider.model_name}"
+            self.embedding_cache = EmbeddingCache(
+                settings.EMBEDDING_CACHE_PATH, model_id, max_rows=settings.EMBEDDING_CACHE_MAX_ROWS
+            )
+            self.provider = CachedEmbeddingProvider(self.provider, self.embedding_cache)
+        if settings.EMBED_CACHE_SIZE:
+            self.provider = MemoryCachedEmbeddingProvider(self.provider, settings.EMBED_CACHE_SIZE)
+        
+        # Per-instance cache of query embeddings; the same questions recur often
+        self._embed_query = lru_cache(maxsize=1024)(self._embed_query_uncached)
+        
+        # The first forward pass pays for weight paging, CUDA context set-up and
+        # kernel selection; do it now rather than on the first request
+        if settings.MODEL_WARMUP:
+            try:
+                self.provider.warm_up()
+            except Exception as e:
+                logger.warning(f"Embedding model warm-up failed: {e}")
+    
+    def close(self) -> None:
+        """Close the persistent embedding cache, if one is configured."""
+        if self.embedding_cache is not None:
+            self.embedding_cache.close()
+    
+    def embed_query(self, text: str) -> np.ndarray:
+        """
+        Embed a single query, reusing the result for repeated queries.
+        
+        Args:
+            text: Query text
+            
+        Returns:
+            np.ndarray: Read-only float32 embedding vector
+        """
+        return self._embed_query(text)
+    
+    def _embed_query_uncached(self, text: str) -> np.ndarray:
+        embedding = self.query_provider.get_embeddings([text])[0].copy()
+        # Shared between callers through the cache, so it must not be modified
+        embedding.flags.writeable = False
+        return embedding
     
     def embed_document_chunks(self, chunks: List[DocumentChunk]) -> Dict[str, Any]:
         """
@@ -93,25 +520,41 @@ class EmbeddingService:
             texts = [chunk.text for chunk in chunks]
             
     
-            embeddings = self.provider.get_embeddings(texts)
-      
-            document_id = str(uuid.uuid4())
+            embeddings = embed_unique(self.provider, texts)
             
-          
-            chunk_data = []
-            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                chunk_data.append({
-                    "id": f"{document_id}_{i}",
-                    "text": chunk.text,
-                    "embedding": embedding,
-                    "metadata": chunk.metadata
-                })
-            
-            return {
-                "document_id": document_id,
-                "chunks": chunk_data
-            }
+            return self.package_document_chunks(chunks, embeddings)
             
         except Exception as e:
             logger.error(f"Error embedding document: {e}")
-            raise
\ No newline at end of file
+            raise
+    
+    def package_document_chunks(self, chunks: List[DocumentChunk], 
+                                embeddings: np.ndarray) -> Dict[str, Any]:
+        """
+        Pair document chunks with their embeddings under a new document ID.
+        
+        Args:
+            chunks: List of document chunks
+            embeddings: Embedding matrix, one row per chunk
+            
+        Returns:
+            Dict containing document ID, the embedding matrix, and per-chunk data
+        """
+        document_id = str(uuid.uuid4())
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        
+        # Each chunk's embedding is a row view into the matrix, not a copy
+        chunk_data = []
+        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+            chunk_data.append({
+                "id": f"{document_id}_{i}",
+                "text": chunk.text,
+                "embedding": embedding,
+                "metadata": chunk.metadata
+            })
+        
+        return {
+            "document_id": document_id,
+            "embeddings": embeddings,
+            "chunks": chunk_data
+        }
\ No newline at end of file
@@ -1,18 +1,36 @@
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, AsyncIterator
 import logging
-import requests
+import httpx
 import json
+import hashlib
 from abc import ABC, abstractmethod
 
 from ..core.config import settings
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for Ollama to finish generating before giving up
+REQUEST_TIMEOUT = 120
+
+SYSTEM_PROMPT = """You are a helpful AI assistant that provides accurate information based on the provided context. 
+When answering questions, ALWAYS use ONLY the information from the provided context. 
+If the context doesn't contain the answer, say "I don't have enough information to answer this question."
+Always provide citations for your answers in the following format: [(Document Name, Page Number)].
+For example: [Sample Document, p.5]
+
+Here is the context information:
+"""
+
 class BaseLLMProvider(ABC):
     """Abstract base class for LLM providers."""
     
     @abstractmethod
-    def generate_response(self, query: str, context: List[Dict[str, Any]], 
+    async def generate_response(self, query: str, context: List[Dict[str, Any]], 
                          conversation_history: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         Generate a response to a query based on context and conversation history.
@@ -31,7 +49,7 @@ class OllamaProvider(BaseLLMProvider):
     """LLM provider using Ollama models."""
     
     def __init__(self, model_name: str = settings.LLM_MODEL, 
-                 base_url: str = "http://13.234.177.214:11434"):  
+                 base_url: str = settings.OLLAMA_BASE_URL):  
         """
         Initialize the Ollama provider.
         
@@ -43,9 +61,25 @@ class OllamaProvider(BaseLLMProvider):
         self.base_url = base_url
         self.api_endpoint = f"{base_url}/api/generate" 
         
+        # Connections are reused across queries, and up to OLLAMA_NUM_PARALLEL requests
+        # are in flight at once without blocking the event loop
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.OLLAMA_NUM_PARALLEL,
+                max_keepalive_connections=settings.OLLAMA_NUM_PARALLEL
+            ),
+            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=10.0)
+        )
+        
+        # Identifies what produced an answer, so cached answers from another model
+        # or prompt are not reused
+        self.fingerprint = hashlib.sha1(
+            f"{model_name}\0{settings.LLM_TEMPERATURE}\0{settings.LLM_CONTEXT_DOCUMENT_ORDER}\0{SYSTEM_PROMPT}".encode("utf-8")
+        ).hexdigest()
+        
         logger.info(f"Initialized Ollama provider with model: {model_name}")
     
-    def generate_response(self, query: str, context: List[Dict[str, Any]], 
+    async def generate_response(self, query: str, context: List[Dict[str, Any]], 
                          conversation_history: Optional[List[Dict[str, Any]]] = None,
                          require_citations: bool = True) -> Dict[str, Any]:
         """
@@ -62,28 +96,7 @@ class OllamaProvider(BaseLLMProvider):
         """
         try:
    
-            context_text = "\n\n".join([f"Document: {ctx['metadata']['source']}, Page: {ctx['metadata']['page']}\n{ctx['text']}" 
-                                      for ctx in context])
-            
-      
-            system_prompt = f"""You are a helpful AI assistant that provides accurate information based on the provided context. 
-When answering questions, ALWAYS use ONLY the information from the provided context. 
-If the context doesn't contain the answer, say "I don't have enough information to answer this question."
-Always provide citations for your answers in the following format: [(Document Name, Page Number)].
-For example: [Sample Document, p.5]
-
-Here is the context information:
-{context_text}"""
-            
-
-            conversation_text = ""
-            if conversation_history:
-                for message in conversation_history:
-                    role = message["role"]
-                    content = message["content"]
-                    conversation_text += f"\n{role.upper()}: {content}"
-       
-            full_prompt = f"{system_prompt}\n\n{conversation_text}\n\nUSER: {query}\n\nASSISTANT:"
+            full_prompt = self._build_prompt(query, context, conversation_history)
             
             
             payload = {
@@ -95,7 +108,7 @@ Here is the context information:
                 }
             }
        
-            response = requests.post(self.api_endpoint, json=payload)
+            response = await self.client.post(self.api_endpoint, json=payload)
             response.raise_for_status()
        
             result = response.json()
@@ -117,7 +130,119 @@ Here is the context information:
         except Exception as e:
             logger.error(f"Error generating response from Ollama: {e}")
             raise
+    
+    async def stream_response(self, query: str, context: List[Dict[str, Any]], 
+                              conversation_history: Optional[List[Dict[str, Any]]] = None,
+                              require_citations: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate a response using Ollama API, yielding the answer as it is generated.
+        
+        Args:
+            query: User query
+            context: Retrieved context documents
+            conversation_history: Optional conversation history
+            require_citations: Whether to include citations in the response
+            
+        Yields:
+            Dict[str, Any]: {"token": text} for each piece of the answer, then
+            {"response": response} with the full answer and citations
+        """
+        try:
+            payload = {
+                "model": self.model_name,
+                "prompt": self._build_prompt(query, context, conversation_history),
+                "stream": True,
+                "options": {
+                    "temperature": settings.LLM_TEMPERATURE
+                }
+            }
+            
+            answer_parts = []
+            async with self.client.stream("POST", self.api_endpoint, json=payload) as response:
+                response.raise_for_status()
+                
+                # Ollama sends one JSON object per line until one has "done" set
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    
+                    result = json.loads(line)
+                    if "error" in result:
+                        raise RuntimeError(result["error"])
+                    
+                    piece = result.get("response", "")
+                    if piece:
+                        answer_parts.append(piece)
+                        yield {"token": piece}
+                    
+                    if result.get("done"):
+                        break
+            
+            answer_text = "".join(answer_parts)
+            citations = self._extract_citations(answer_text, context) if require_citations else []
+            
+            yield {"response": {"answer": answer_text, "citations": citations}}
+            
+        except Exception as e:
+            logger.error(f"Error streaming response from Ollama: {e}")
+            raise
             
+    def _build_prompt(self, query: str, context: List[Dict[str, Any]],
+                      conversation_history: Optional[List[Dict[str, Any]]] = None) -> str:
+        """
+        Build the prompt sent to Ollama.
+        
+        Ollama reuses the KV cache for the longest prompt prefix it has already
+        processed, so the system prompt comes first. Context documents keep the
+        reranker's order, most relevant first; with LLM_CONTEXT_DOCUMENT_ORDER they
+        are put in document order instead, so follow-up turns retrieving the same
+        chunks produce a byte-identical prefix and skip its prefill.
+        
+        Args:
+            query: User query
+            context: Retrieved context documents
+            conversation_history: Optional conversation history
+            
+        Returns:
+            str: The full prompt
+        """
+        ordered_context = context
+        if settings.LLM_CONTEXT_DOCUMENT_ORDER:
+            ordered_context = sorted(
+                context,
+                key=lambda ctx: (str(ctx["metadata"].get("source", "")), ctx["metadata"].get("chunk_id", 0))
+            )
+        
+        parts = [SYSTEM_PROMPT]
+        for i, ctx in enumerate(ordered_context):
+            if i:
+                parts.append("\n\n")
+            parts.append(f"Document: {ctx['metadata']['source']}, Page: {ctx['metadata']['page']}\n{ctx['text']}")
+        
+        parts.append("\n\n")
+        for message in conversation_history or ():
+            parts.append(f"\n{message['role'].upper()}: {message['content']}")
+        
+        parts.append(f"\n\nUSER: {query}\n\nASSISTANT:")
+        
+        return "".join(parts)
+    
+    async def warm_up(self) -> None:
+        """
+        Ask Ollama to load the model, so the first query doesn't wait for it.
+        A generate request without a prompt loads the model and returns at once.
+        """
+        try:
+            response = await self.client.post(self.api_endpoint, json={"model": self.model_name})
+            response.raise_for_status()
+            logger.info(f"Warmed up Ollama model: {self.model_name}")
+        except Exception as e:
+            logger.warning(f"Ollama warm-up failed: {e}")
+    
+    async def close(self) -> None:
+        """Close the pooled HTTP connections."""
+        await self.client.aclose()
+    
     def _extract_citations(self, answer: str, context: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Extract citation information from the answer.
@@ -131,27 +256,61 @@ Here is the context information:
             List[Dict[str, Any]]: List of citation objects
         """
 
-        citations = []
-        
-
-        for ctx in context:
-          
-            if len(ctx["text"]) > 30 and any(
-                segment in answer 
-                for segment in [ctx["text"][:30], ctx["text"][30:60], ctx["text"][-30:]]
-            ):
-                citations.append({
-                    "page": ctx["metadata"].get("page", 1),
-                    "document_name": ctx["metadata"].get("source", "unknown")
-                })
+        matched = self._match_context(answer, context)
    
         unique_citations = []
         seen = set()
         
-        for citation in citations:
+        for i in matched:
+            metadata = context[i]["metadata"]
+            citation = {
+                "page": metadata.get("page", 1),
+                "document_name": metadata.get("source", "unknown")
+            }
             key = (citation["page"], citation["document_name"])
             if key not in seen:
                 seen.add(key)
                 unique_citations.append(citation)
         
-        return unique_citations
\ No newline at end of file
+        return unique_citations
+    
+    def _match_context(self, answer: str, context: List[Dict[str, Any]]) -> List[int]:
+        """
+        Find the context documents whose text is quoted in the answer.
+        A document matches if its first, second or last 30 characters appear in
+        the answer. With pyahocorasick installed all segments are matched in a
+        single pass over the answer instead of one substring scan per segment.
+        
+        Args:
+            answer: Generated answer text
+            context: Context used for generation
+            
+        Returns:
+            List[int]: Indices of the matching context documents, in context order
+        """
+        segments = [
+            (i, [ctx["text"][:30], ctx["text"][30:60], ctx["text"][-30:]])
+            for i, ctx in enumerate(context)
+            if len(ctx["text"]) > 30
+        ]
+        
+        # Without pyahocorasick, plain substring checks are used: str.__contains__ runs in
+        # C and, for the handful of reranked documents in a context, is faster than
+        # hashing every window of the answer in Python
+        if ahocorasick is None or not segments:
+            return [i for i, needles in segments if any(needle in answer for needle in needles)]
+        
+        # Several documents can share a segment, so each needle maps to a set of indices
+        automaton = ahocorasick.Automaton()
+        for i, needles in segments:
+            for needle in needles:
+                if needle not in automaton:
+                    automaton.add_word(needle, set())
+                automaton.get(needle).add(i)
+        automaton.make_automaton()
+        
+        matched = set()
+        for _, indices in automaton.iter(answer):
+            matched.update(indices)
+        
+        return sorted(matched)
@@ -0,0 +1,55 @@
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
+from fastapi.middleware.cors import CORSMiddleware
+import logging
+
+from .api.routes import router
+from .api.services import lifespan
+from .core.config import settings
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(),
+        logging.FileHandler("app.log")
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# Create FastAPI app
+app = FastAPI(
+    title=settings.PROJECT_NAME,
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+
+# Add CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Include routers
+app.include_router(router)
+
+@app.get("/")
+async def root():
+    return {"message": "Welcome to the Document Intelligence RAG API"}
+
+@app.get("/health")
+async def health_check(request: Request):
+    health = {"status": "healthy"}
+    
+    services = getattr(request.app.state, "services", None)
+    cache_info = getattr(services.embedding_service.provider, "cache_info", None) if services else None
+    if cache_info is not None:
+        health["embedding_cache"] = cache_info()
+    
+    return health
\ No newline at end of file
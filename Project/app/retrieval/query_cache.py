@@ -0,0 +1,202 @@
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import logging
+import threading
+import orjson
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Chroma collection holding cached responses across restarts
+RESPONSE_CACHE_COLLECTION = "llm_cache"
+
+class QueryCache:
+    """
+    Two-tier cache of query responses: exact matches on the normalized query,
+    then semantic matches on the cosine similarity of query embeddings.
+
+    With a Chroma client, responses are also persisted in a collection so semantic
+    hits survive restarts and are shared between workers. Persisted entries are
+    tagged with a fingerprint of the model and prompt that produced them and only
+    match while it is unchanged.
+    """
+
+    def __init__(self, max_entries: int = 2048, similarity_threshold: float = 0.97,
+                 client: Optional[Any] = None, fingerprint: str = ""):
+        """
+        Initialize the query cache.
+
+        Args:
+            max_entries: Maximum number of responses kept in memory
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            client: Optional Chroma client used to persist responses
+            fingerprint: Identifies the model and prompt producing the responses
+        """
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.fingerprint = fingerprint
+
+        self._collection = None
+        if client is not None:
+            self._collection = client.get_or_create_collection(
+                name=RESPONSE_CACHE_COLLECTION,
+                metadata={"hnsw:space": "cosine"}
+            )
+
+        # Lookups run on worker threads when the persistent collection is used
+        self._lock = threading.RLock()
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # (document_id, require_citations) -> (entry keys, stacked embeddings or None if stale)
+        self._groups: Dict[Tuple[str, bool], Tuple[List[str], Optional[np.ndarray]]] = {}
+
+    @staticmethod
+    def make_key(query: str, document_id: str, require_citations: bool) -> str:
+        """Build the exact-match key for a query."""
+        normalized_query = " ".join(query.lower().split())
+        raw_key = f"{document_id}\0{normalized_query}\0{require_citations}"
+        return hashlib.sha1(raw_key.encode("utf-8")).hexdigest()
+
+    def get_exact(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a response by exact key.
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            Optional[Dict[str, Any]]: Cached response or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            self._entries.move_to_end(key)
+            return entry["response"]
+
+    def get_similar(self, embedding: np.ndarray, document_id: str,
+                    require_citations: bool) -> Optional[Dict[str, Any]]:
+        """
+        Look up a response for a semantically similar query on the same document.
+
+        Args:
+            embedding: Normalized query embedding
+            document_id: Document the query targets
+            require_citations: Whether citations were requested
+
+        Returns:
+            Optional[Dict[str, Any]]: Cached response or None
+        """
+        group_key = (document_id, require_citations)
+        with self._lock:
+            group = self._groups.get(group_key)
+            if group and group[0]:
+                keys, matrix = group
+                if matrix is None:
+                    matrix = np.vstack([self._entries[key]["embedding"] for key in keys])
+                    self._groups[group_key] = (keys, matrix)
+
+                similarities = matrix @ np.asarray(embedding, dtype=np.float32)
+                best = int(np.argmax(similarities))
+
+                if similarities[best] >= self.similarity_threshold:
+                    logger.info(f"Semantic cache hit with similarity {similarities[best]:.3f}")
+                    return self.get_exact(keys[best])
+
+        if self._collection is None:
+            return None
+
+        return self._get_persisted(embedding, document_id, require_citations)
+
+    def _get_persisted(self, embedding: np.ndarray, document_id: str,
+                       require_citations: bool) -> Optional[Dict[str, Any]]:
+        """Look up a semantically similar response in the persistent collection."""
+        try:
+            results = self._collection.query(
+                query_embeddings=[np.asarray(embedding, dtype=np.float32).tolist()],
+                n_results=1,
+                where={"$and": [
+                    {"document_id": document_id},
+                    {"require_citations": require_citations},
+                    {"fingerprint": self.fingerprint}
+                ]},
+                include=["metadatas", "distances"]
+            )
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            return None
+
+        if not results["ids"] or not results["ids"][0]:
+            return None
+
+        distance = results["distances"][0][0]
+        if distance > 1 - self.similarity_threshold:
+            return None
+
+        logger.info(f"Persistent cache hit with similarity {1 - distance:.3f}")
+        response = orjson.loads(results["metadatas"][0][0]["response"])
+        self._put_memory(results["ids"][0][0], embedding, document_id, require_citations, response)
+        return response
+
+    def put(self, key: str, embedding: np.ndarray, document_id: str,
+            require_citations: bool, response: Dict[str, Any]) -> None:
+        """
+        Cache a response.
+
+        Args:
+            key: Key from make_key
+            embedding: Normalized query embedding
+            document_id: Document the query targets
+            require_citations: Whether citations were requested
+            response: Response to cache
+
+        Returns:
+            None
+        """
+        self._put_memory(key, embedding, document_id, require_citations, response)
+
+        if self._collection is None:
+            return
+
+        try:
+            self._collection.upsert(
+                ids=[key],
+                embeddings=[np.asarray(embedding, dtype=np.float32).tolist()],
+                metadatas=[{
+                    "document_id": document_id,
+                    "require_citations": require_citations,
+                    "fingerprint": self.fingerprint,
+                    "response": orjson.dumps(response).decode("utf-8")
+                }]
+            )
+        except Exception as e:
+            logger.warning(f"Could not persist cached response: {e}")
+
+    def _put_memory(self, key: str, embedding: np.ndarray, document_id: str,
+                    require_citations: bool, response: Dict[str, Any]) -> None:
+        """Add a response to the in-memory tier, evicting the least recently used."""
+        with self._lock:
+            group_key = (document_id, require_citations)
+
+            if key not in self._entries:
+                keys, _ = self._groups.get(group_key, ([], None))
+                keys.append(key)
+                self._groups[group_key] = (keys, None)
+
+            self._entries[key] = {
+                "group": group_key,
+                "embedding": np.asarray(embedding, dtype=np.float32),
+                "response": response
+            }
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                keys, _ = self._groups[evicted["group"]]
+                keys.remove(evicted_key)
+                if keys:
+                    self._groups[evicted["group"]] = (keys, None)
+                else:
+                    del self._groups[evicted["group"]]
@@ -2,6 +2,7 @@ from typing import List, Dict, Any, Optional
 import logging
 from sentence_transformers import CrossEncoder
 import numpy as np
+import torch
 
 from ..core.config import settings
 
@@ -10,19 +11,39 @@ logger = logging.getLogger(__name__)
 class Reranker:
     """Re-ranker for improving retrieval precision."""
     
-    def __init__(self, model_name: str = settings.RERANKER_MODEL):
+    def __init__(self, model_name: str = settings.RERANKER_MODEL,
+                 batch_size: int = settings.RERANKER_BATCH_SIZE):
         """
         Initialize the re-ranker with a specific model.
         
         Args:
             model_name: Name or path of the re-ranking model
+            batch_size: Number of query/text pairs per model forward pass
         """
+        self.batch_size = batch_size
         try:
-            self.model = CrossEncoder(model_name)
-            logger.info(f"Loaded re-ranker model: {model_name}")
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            self.model = CrossEncoder(model_name, device=device)
+            
+            # Half precision halves memory traffic on GPU; CPUs keep float32
+            if device == "cuda":
+                self.model.model.half()
+            
+            logger.info(f"Loaded re-ranker model: {model_name} on {device}")
         except Exception as e:
             logger.error(f"Error loading re-ranker model {model_name}: {e}")
             raise
+        
+        if settings.MODEL_WARMUP:
+            self.warm_up()
+    
+    def warm_up(self) -> None:
+        """Score a dummy pair so lazy initialization happens before the first real request."""
+        try:
+            with torch.inference_mode():
+                self.model.predict([("warmup", "warmup")], show_progress_bar=False)
+        except Exception as e:
+            logger.warning(f"Re-ranker warm-up failed: {e}")
     
     def rerank(self, query: str, results: List[Dict[str, Any]], top_k: int = 5) -> List[Dict[str, Any]]:
         """
@@ -34,25 +55,41 @@ class Reranker:
             top_k: Number of top results to return
             
         Returns:
-            List[Dict[str, Any]]: Re-ranked results
+            List[Dict[str, Any]]: Copies of the top results with a rerank_score, best first
         """
         try:
             if not results:
                 return []
             
        
-            input_pairs = [(query, result["text"]) for result in results]
+            # Score pairs in order of text length so each batch pads to similar lengths
+            order = sorted(range(len(results)), key=lambda i: len(results[i]["text"]))
+            input_pairs = [(query, results[i]["text"]) for i in order]
             
         
-            scores = self.model.predict(input_pairs)
+            with torch.inference_mode():
+                scores = self.model.predict(
+                    input_pairs,
+                    batch_size=self.batch_size,
+                    show_progress_bar=False,
+                    convert_to_numpy=True
+                )
 
-            for i, result in enumerate(results):
-                result["rerank_score"] = float(scores[i])
+            # Scores back in result order, then select the top_k without sorting them all
+            result_scores = np.empty(len(results), dtype=np.float32)
+            result_scores[order] = scores
             
- 
-            reranked_results = sorted(results, key=lambda x: x["rerank_score"], reverse=True)
+            top_k = min(top_k, len(results))
+            if top_k <= 0:
+                return []
+            top = np.sort(np.argpartition(-result_scores, top_k - 1)[:top_k])
+            top = top[np.argsort(-result_scores[top], kind="stable")]
            
-            return reranked_results[:top_k]
+            # One bulk conversion to Python floats instead of boxing each score
+            return [
+                dict(results[i], rerank_score=score)
+                for i, score in zip(top.tolist(), result_scores[top].tolist())
+            ]
             
         except Exception as e:
             logger.error(f"Error re-ranking results: {e}")
@@ -2,15 +2,43 @@ from typing import List, Dict, Any, Optional, Union
 import logging
 import os
 import chromadb
+from chromadb.config import Settings as ChromaSettings
 from chromadb.utils import embedding_functions
+from functools import lru_cache
 import uuid
 import json
+import ast
+import numpy as np
 
 from ..core.config import settings
 from ..document_processing.processor import DocumentChunk
 
 logger = logging.getLogger(__name__)
 
+# Metadata value types Chroma stores as-is; lists are stored as JSON, anything else as a string
+_METADATA_TYPES = (str, int, float, bool)
+
+def _encode_metadata_value(value: Any) -> Any:
+    """Convert a metadata value to a type Chroma accepts."""
+    if isinstance(value, _METADATA_TYPES):
+        return value
+    if isinstance(value, (list, tuple)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+def _sanitize_metadata(metadata: Dict[str, Any], document_id: str) -> Dict[str, Any]:
+    """
+    Copy chunk metadata into a form Chroma accepts, tagged with the document ID.
+    Chroma rejects None values, so those keys are left out.
+    """
+    sanitized = {
+        key: _encode_metadata_value(value)
+        for key, value in metadata.items()
+        if value is not None
+    }
+    sanitized["document_id"] = document_id
+    return sanitized
+
 class VectorStore:
     """Vector store for document embeddings using ChromaDB."""
     
@@ -23,7 +51,11 @@ class VectorStore:
         """
         try:
  
-            self.client = chromadb.PersistentClient(path=settings.VECTOR_DB_PATH)
+            # Telemetry would otherwise send an event for every collection call
+            self.client = chromadb.PersistentClient(
+                path=settings.VECTOR_DB_PATH,
+                settings=ChromaSettings(anonymized_telemetry=False)
+            )
             
         
             self.collection = self.client.get_or_create_collection(
@@ -37,6 +69,18 @@ class VectorStore:
             logger.error(f"Error initializing vector store: {e}")
             raise
     
+    def warm_up(self) -> None:
+        """
+        Load the collection's vector index into memory with a one-result query,
+        so the first user query doesn't pay for reading it from disk.
+        """
+        try:
+            sample = self.collection.peek(limit=1)
+            if sample["embeddings"]:
+                self.collection.query(query_embeddings=[sample["embeddings"][0]], n_results=1)
+        except Exception as e:
+            logger.warning(f"Could not warm up vector store: {e}")
+    
     def add_document(self, document_data: Dict[str, Any]) -> str:
         """
         Add a document to the vector store.
@@ -52,36 +96,20 @@ class VectorStore:
             chunks = document_data["chunks"]
             
   
-            ids = []
-            embeddings = []
-            metadatas = []
-            documents = []
-            
-            for chunk in chunks:
-                ids.append(chunk["id"])
-                embeddings.append(chunk["embedding"])
-                
-          
-                metadata = chunk["metadata"].copy()
-                
-           
-                metadata["document_id"] = document_id
-                
-                for key, value in metadata.items():
-              
-                    if isinstance(value, list):
-                        metadata[key] = str(value)
-      
-                    elif not isinstance(value, (str, int, float, bool, type(None))):
-                        metadata[key] = str(value)
-                
-                metadatas.append(metadata)
-                documents.append(chunk["text"])
+            embeddings = document_data.get("embeddings")
+            if embeddings is None:
+                embeddings = [chunk["embedding"] for chunk in chunks]
+            
+            ids = [chunk["id"] for chunk in chunks]
+            documents = [chunk["text"] for chunk in chunks]
+            metadatas = [_sanitize_metadata(chunk["metadata"], document_id) for chunk in chunks]
             
        
+            # chromadb validates embeddings as plain lists of floats; convert the
+            # whole matrix in one call rather than row by row
             self.collection.add(
                 ids=ids,
-                embeddings=embeddings,
+                embeddings=np.asarray(embeddings, dtype=np.float32).tolist(),
                 metadatas=metadatas,
                 documents=documents
             )
@@ -94,7 +122,31 @@ class VectorStore:
             logger.error(f"Error adding document to vector store: {e}")
             raise
     
-    def query(self, query_text: str, embedding: List[float], document_id: Optional[str] = None, 
+    def add_batch(self, chunks: List[DocumentChunk], embeddings: np.ndarray,
+                  document_id: str, start_index: int = 0) -> None:
+        """
+        Add one batch of a document's chunks to the vector store, so a document
+        can be embedded and stored a batch at a time.
+        
+        Args:
+            chunks: Document chunks in the batch
+            embeddings: Embedding matrix, one row per chunk
+            document_id: ID of the document the chunks belong to
+            start_index: Position of the batch's first chunk in the document
+        """
+        try:
+            self.collection.add(
+                ids=[f"{document_id}_{start_index + i}" for i in range(len(chunks))],
+                embeddings=np.asarray(embeddings, dtype=np.float32).tolist(),
+                metadatas=[_sanitize_metadata(chunk.metadata, document_id) for chunk in chunks],
+                documents=[chunk.text for chunk in chunks]
+            )
+            
+        except Exception as e:
+            logger.error(f"Error adding chunks to vector store: {e}")
+            raise
+    
+    def query(self, query_text: str, embedding: Union[np.ndarray, List[float]], document_id: Optional[str] = None, 
           n_results: int = 5) -> List[Dict[str, Any]]:
         """
         Query the vector store for similar documents.
@@ -108,53 +160,106 @@ class VectorStore:
         Returns:
             List[Dict[str, Any]]: List of query results
         """
+        processed_results = self.query_batch(
+            np.asarray(embedding, dtype=np.float32).reshape(1, -1),
+            document_ids=[document_id] if document_id else None,
+            n_results=n_results
+        )[0]
+        
+        if not processed_results:
+            logger.warning(f"Empty results from ChromaDB. Document ID: {document_id}, Query: {query_text[:50]}...")
+        
+        return processed_results
+    
+    def query_batch(self, embeddings: Union[np.ndarray, List[List[float]]],
+                    document_ids: Optional[List[str]] = None,
+                    n_results: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Query the vector store for several embeddings with a single Chroma call.
+        
+        Args:
+            embeddings: Query embedding matrix, one query per row
+            document_ids: Optional document IDs to restrict all queries to
+            n_results: Number of results to return per query
+            
+        Returns:
+            List[List[Dict[str, Any]]]: Query results for each embedding, in order
+        """
         try:
-           
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+            if len(embeddings) == 0:
+                return []
+            
             filter_condition = None
-            if document_id:
-             
-                filter_condition = {"document_id": document_id}
+            if document_ids:
+                if len(document_ids) == 1:
+                    filter_condition = {"document_id": document_ids[0]}
+                else:
+                    filter_condition = {"document_id": {"$in": list(document_ids)}}
                 
          
             results = self.collection.query(
-                query_embeddings=[embedding],
+                query_embeddings=embeddings.tolist(),
                 n_results=n_results,
                 where=filter_condition  
             )
-   
-            processed_results = []
             
-            if not results or not results['ids'] or not results['ids'][0]:
-       
-                logger.warning(f"Empty results from ChromaDB. Document ID: {document_id}, Query: {query_text[:50]}...")
-                return []
+            if not results or not results['ids']:
+                return [[] for _ in range(len(embeddings))]
+            
+            batch_results = [self._process_results(results, row) for row in range(len(results['ids']))]
             
-            for i in range(len(results['ids'][0])):
+            logger.info(f"Query returned {sum(len(rows) for rows in batch_results)} results for {len(embeddings)} queries")
+            
+            return batch_results
+            
+        except Exception as e:
+            logger.error(f"Error querying vector store: {e}")
+            raise
+    
+    def _process_results(self, results: Dict[str, Any], row: int) -> List[Dict[str, Any]]:
+        """Convert one query's rows of a Chroma query result into result dicts."""
+        processed_results = []
+        
+        for i in range(len(results['ids'][row])):
 
-                result_id = results['ids'][0][i]
-                result_text = results['documents'][0][i]
-                result_metadata = results['metadatas'][0][i]
-                result_distance = results['distances'][0][i] if 'distances' in results else None
-     
-                for key, value in result_metadata.items():
-                    if isinstance(value, str) and value.startswith('[') and value.endswith(']'):
+            result_id = results['ids'][row][i]
+            result_text = results['documents'][row][i]
+            result_metadata = results['metadatas'][row][i]
+            result_distance = results['distances'][row][i] if results.get('distances') else None
+ 
+            for key, value in result_metadata.items():
+                if isinstance(value, str) and value.startswith('[') and value.endswith(']'):
+                    try:
+                        result_metadata[key] = json.loads(value)
+                    except ValueError:
+                        # Lists stored before metadata was written as JSON
                         try:
-                            import ast
                             result_metadata[key] = ast.literal_eval(value)
                         except (SyntaxError, ValueError):
                             pass
-                
-                processed_results.append({
-                    "id": result_id,
-                    "text": result_text,
-                    "metadata": result_metadata,
-                    "distance": result_distance
-                })
-            
-            logger.info(f"Query returned {len(processed_results)} results")
             
-            return processed_results
-            
-        except Exception as e:
-            logger.error(f"Error querying vector store: {e}")
-            raise
\ No newline at end of file
+            processed_results.append({
+                "id": result_id,
+                "text": result_text,
+                "metadata": result_metadata,
+                "distance": result_distance
+            })
+        
+        return processed_results
+
+@lru_cache(maxsize=None)
+def get_vector_store(collection_name: str = "documents") -> VectorStore:
+    """
+    Get the shared vector store for a collection, opening it and loading its
+    index on first use.
+    
+    Args:
+        collection_name: Name of the collection to use
+        
+    Returns:
+        VectorStore: The vector store for the collection
+    """
+    vector_store = VectorStore(collection_name)
+    vector_store.warm_up()
+    return vector_store
@@ -3,16 +3,30 @@ import subprocess
 import time
 import os
 import sys
+import urllib.request
 
 def run_fastapi_server():
     """Run the FastAPI server"""
     print("Starting FastAPI server...")
     process = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--host", "0.0.0.0", "--port", "8000"])
-    # Wait for server to start
-    time.sleep(10)  # Give it 10 seconds to fully initialize
-    print("FastAPI server is running on http://localhost:8000")
+    # Wait until the server answers health checks; models load before it starts accepting requests
+    if wait_for_server("http://127.0.0.1:8000/health", process):
+        print("FastAPI server is running on http://localhost:8000")
+    else:
+        print("FastAPI server did not become ready")
     return process
 
+def wait_for_server(url, process, timeout=120):
+    """Poll a URL until it responds, the process exits or the timeout passes"""
+    deadline = time.time() + timeout
+    while time.time() < deadline and process.poll() is None:
+        try:
+            urllib.request.urlopen(url, timeout=0.5)
+            return True
+        except Exception:
+            time.sleep(0.1)
+    return False
+
 def run_streamlit_app():
     """Run the Streamlit app"""
     print("Starting Streamlit app...")
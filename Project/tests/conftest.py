@@ -0,0 +1,59 @@
+# conftest.py
+import os
+import logging
+import numpy as np
+import pytest
+
+from app.document_processing.processor import BaseDocumentProcessor
+from app.embeddings.embedding_provider import BaseEmbeddingProvider, EmbeddingService
+from app.retrieval.vector_store import VectorStore
+
+# Test modules only create their loggers; INFO output is turned on by their __main__ blocks
+logging.basicConfig(level=logging.WARNING)
+
+class CountingProvider(BaseEmbeddingProvider):
+    """Deterministic stand-in for an embedding model that records each batch it embedded"""
+    model_name = "counting"
+
+    def __init__(self):
+        self.calls = []
+
+    def get_embeddings(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(text), sum(map(ord, text)) % 97] for text in texts], dtype=np.float32)
+
+@pytest.fixture(scope="session")
+def file_path():
+    """Sample document used by the tests; set TEST_DOCUMENT to use another file"""
+    path = os.environ.get("TEST_DOCUMENT", "Part_1.txt")
+    if not os.path.exists(path):
+        pytest.skip(f"Test file not found: {path}")
+    return path
+
+@pytest.fixture(scope="session")
+def chunks(file_path):
+    """Sample document processed and chunked once for the whole run"""
+    processor = BaseDocumentProcessor.get_processor_for_file(file_path)
+    return processor.chunk(processor.process(file_path))
+
+@pytest.fixture(scope="session")
+def embedding_service():
+    """Embedding service with the model loaded once for the whole run"""
+    return EmbeddingService()
+
+@pytest.fixture(scope="session")
+def vector_store():
+    """Vector store opened once for the whole run"""
+    return VectorStore()
+
+@pytest.fixture(scope="session")
+def indexed_doc(chunks, embedding_service, vector_store):
+    """Sample document embedded and added to the vector store"""
+    document_data = embedding_service.embed_document_chunks(chunks)
+    document_id = vector_store.add_document(document_data)
+    return document_id, chunks, document_data
+
+@pytest.fixture
+def counting_provider():
+    """Embedding provider that needs no model, for testing the layers around providers"""
+    return CountingProvider()
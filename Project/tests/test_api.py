@@ -1,36 +1,35 @@
 # test_api.py
-import sys
 import os
 import logging
+import pytest
 from fastapi.testclient import TestClient
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-
 # Import our application
 from app import app
 
-client = TestClient(app)
+@pytest.fixture(scope="module")
+def client():
+    """Test client with the app's lifespan (model loading) run once for the module"""
+    with TestClient(app) as client:
+        yield client
 
-def test_root_endpoint():
+def test_root_endpoint(client):
     """Test the root endpoint"""
     response = client.get("/")
     assert response.status_code == 200
     assert "message" in response.json()
     logger.info("Root endpoint test passed")
 
-def test_health_endpoint():
+def test_health_endpoint(client):
     """Test the health check endpoint"""
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"
     logger.info("Health endpoint test passed")
 
-def test_embedding_endpoint():
+def test_embedding_endpoint(client):
     """Test the embedding endpoint with a sample file"""
     test_file = "Part_1.txt"
     
@@ -54,7 +53,7 @@ def test_embedding_endpoint():
         logger.warning(f"Test file not found: {test_file}")
         return None
 
-def test_query_endpoint(document_id):
+def test_query_endpoint(client, document_id):
     """Test the query endpoint with a sample query"""
     if not document_id:
         logger.warning("No document_id provided, skipping query test")
@@ -93,7 +92,10 @@ def test_query_endpoint(document_id):
     logger.info("Query endpoint test passed")
 
 if __name__ == "__main__":
-    test_root_endpoint()
-    test_health_endpoint()
-    document_id = test_embedding_endpoint()
-    test_query_endpoint(document_id)
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    
+    with TestClient(app) as client:
+        test_root_endpoint(client)
+        test_health_endpoint(client)
+        document_id = test_embedding_endpoint(client)
+        test_query_endpoint(client, document_id)
\ No newline at end of file
@@ -1,15 +1,8 @@
 # tests/test_chunking.py
-import os
-import sys
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Add project root to path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from app.document_processing.hierarchical_chunker import HierarchicalChunker
 from app.document_processing.processor import Document
 from app.document_processing.txt_processor import TxtProcessor
@@ -62,28 +55,28 @@ def test_hierarchical_chunking():
     # Log results
     logger.info(f"Created {len(chunks['parents'])} parent chunks and {len(chunks['children'])} child chunks")
     
-    # Print parent chunks
-    for i, parent in enumerate(chunks['parents']):
-        logger.info(f"Parent {i}:")
-        logger.info(f"Text (first 100 chars): {parent['text'][:100]}...")
-        logger.info(f"Metadata: {parent['metadata']}")
+    # Print some parent chunks
+    for i, parent in enumerate(chunks['parents'][:2]):
+        logger.info("Parent %d:", i)
+        logger.info("Text (first 100 chars): %.100s...", parent['text'])
+        logger.info("Metadata: %s", parent['metadata'])
     
     # Print some child chunks
-    for i, child in enumerate(chunks['children'][:3]):
-        logger.info(f"Child {i}:")
-        logger.info(f"Text (first 100 chars): {child['text'][:100]}...")
-        logger.info(f"Metadata: {child['metadata']}")
-    
-    return chunks
+    for i, child in enumerate(chunks['children'][:2]):
+        logger.info("Child %d:", i)
+        logger.info("Text (first 100 chars): %.100s...", child['text'])
+        logger.info("Metadata: %s", child['metadata'])
+    
+    parents = chunks["parents"]
+    assert parents and chunks["children"]
+    # The page markers are picked up by the parents
+    assert sorted({page for parent in parents for page in parent["metadata"]["pages"]}) == [1, 2, 3, 4]
+    for child in chunks["children"]:
+        parent = parents[child["metadata"]["parent_index"]]
+        assert child["metadata"]["source"] == "test.txt"
+        assert child["text"] in parent["text"]
 
-def test_document_processors():
-    """Test the document processors with hierarchical chunking"""
-    logger.info("Testing document processors with hierarchical chunking")
-    
-    # Create a sample TXT file
-    sample_file = "test_sample.txt"
-    with open(sample_file, "w", encoding="utf-8") as f:
-        f.write("""
+SAMPLE_TEXT = """
         # Document Title
         
         This is a sample document to test the document processors with hierarchical chunking.
@@ -97,7 +90,30 @@ def test_document_processors():
         
         This is the second section of the document. It also contains sample text for chunking.
         The hierarchical chunker should create parent chunks for larger context and child chunks for specific information.
-        """)
+        """
+
+def test_hierarchical_chunking_with_page_spans():
+    """Parent chunks take their pages from the processor's page spans, children from their parent"""
+    pages = ["First page paragraph.", "Second page paragraph.", "Third page paragraph."]
+    text = "\n\n".join(pages)
+    page_spans = []
+    start = 0
+    for page_num, page_text in enumerate(pages, 1):
+        page_spans.append((start, start + len(page_text), page_num))
+        start += len(page_text) + 2
+    
+    chunker = HierarchicalChunker(parent_max_size=50, child_max_size=30, overlap_size=0)
+    chunks = chunker.create_hierarchical_chunks(text, {"source": "test.pdf"}, page_spans)
+    
+    assert [parent["metadata"]["pages"] for parent in chunks["parents"]] == [[1, 2], [3]]
+    assert all(
+        child["metadata"]["pages"] == chunks["parents"][child["metadata"]["parent_index"]]["metadata"]["pages"]
+        for child in chunks["children"]
+    )
+
+def test_document_processors():
+    """Test the document processors with hierarchical chunking"""
+    logger.info("Testing document processors with hierarchical chunking")
     
     # Test all processors
     processors = [
@@ -108,27 +124,22 @@ def test_document_processors():
     for name, processor in processors:
         logger.info(f"Testing {name} processor")
         
-        # Process file
-        document = processor.process(sample_file)
+        # Build the document from memory; no sample file is written
+        document = processor.process_text(SAMPLE_TEXT, source="test_sample.txt")
         logger.info(f"Processed document: {document.metadata['source']}")
         
         # Chunk document
         chunks = processor.chunk(document)
         
-        # For hierarchical chunkers
-        if hasattr(chunks, '__len__'):
-            logger.info(f"Created {len(chunks)} chunks")
-            # Display a sample of chunks
-            for i, chunk in enumerate(chunks[:2]):
-                logger.info(f"Chunk {i}:")
-                logger.info(f"Text (first 100 chars): {chunk.text[:100]}...")
-                logger.info(f"Metadata: {chunk.metadata}")
-        else:
-            logger.info("Chunking method returned a non-list result")
-    
-    # Clean up
-    os.remove(sample_file)
+        logger.info(f"Created {len(chunks)} chunks")
+        # Display a sample of chunks
+        for i, chunk in enumerate(chunks[:2]):
+            logger.info("Chunk %d:", i)
+            logger.info("Text (first 100 chars): %.100s...", chunk.text)
+            logger.info("Metadata: %s", chunk.metadata)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
     test_hierarchical_chunking()
     test_document_processors()
\ No newline at end of file
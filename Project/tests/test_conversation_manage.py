@@ -0,0 +1,74 @@
+# test_conversation_manage.py
+import json
+import pytest
+
+from app.api.conversation_manage import ConversationManager
+
+def test_messages_replayed_from_log(tmp_path):
+    """A new manager rebuilds a conversation from its metadata and JSONL log"""
+    manager = ConversationManager(storage_dir=str(tmp_path))
+    conversation_id = manager.create_conversation("doc-1")
+    manager.add_message(conversation_id, "user", "What is this?")
+    manager.add_message(conversation_id, "assistant", "A test.", {"answer": "A test."})
+    manager.close()
+
+    reloaded = ConversationManager(storage_dir=str(tmp_path))
+    history = reloaded.get_conversation_history(conversation_id)
+
+    assert [message["content"] for message in history] == ["What is this?", "A test."]
+    assert history[1]["response_data"] == {"answer": "A test."}
+    assert reloaded.get_llm_history(conversation_id, limit=1) == [{"role": "assistant", "content": "A test."}]
+    reloaded.close()
+
+def test_legacy_conversation_migrated(tmp_path):
+    """A conversation saved as a single JSON file moves to the log layout on first access"""
+    legacy = {
+        "id": "legacy",
+        "document_id": "doc-1",
+        "created_at": 1.0,
+        "updated_at": 2.0,
+        "messages": [{"role": "user", "content": "Hello", "timestamp": 2.0}]
+    }
+    legacy_path = tmp_path / "legacy.json"
+    legacy_path.write_text(json.dumps(legacy))
+
+    manager = ConversationManager(storage_dir=str(tmp_path))
+    assert manager.get_llm_history("legacy") == [{"role": "user", "content": "Hello"}]
+    manager.close()
+
+    assert not legacy_path.exists()
+    assert (tmp_path / "legacy.json.migrated").exists()
+    assert (tmp_path / "legacy.meta.json").exists()
+
+    reloaded = ConversationManager(storage_dir=str(tmp_path))
+    assert [message["content"] for message in reloaded.get_conversation_history("legacy")] == ["Hello"]
+    reloaded.close()
+
+def test_evicted_conversation_reloaded(tmp_path):
+    """Conversations beyond max_cached are evicted from memory and reloaded from disk"""
+    manager = ConversationManager(storage_dir=str(tmp_path), max_cached=2)
+    conversation_ids = [manager.create_conversation(f"doc-{i}") for i in range(3)]
+    for conversation_id in conversation_ids:
+        manager.add_message(conversation_id, "user", conversation_id)
+
+    assert list(manager.conversations) == conversation_ids[1:]
+    assert conversation_ids[0] not in manager._fhandles
+
+    assert manager.get_llm_history(conversation_ids[0]) == [{"role": "user", "content": conversation_ids[0]}]
+    assert list(manager.conversations) == [conversation_ids[2], conversation_ids[0]]
+    manager.close()
+
+def test_failed_append_leaves_memory_unchanged(tmp_path, monkeypatch):
+    """A message that could not be written to the log is not added in memory either"""
+    manager = ConversationManager(storage_dir=str(tmp_path))
+    conversation_id = manager.create_conversation("doc-1")
+
+    def fail(conversation_id, message):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(manager, "_append_message", fail)
+    with pytest.raises(OSError):
+        manager.add_message(conversation_id, "user", "lost")
+
+    assert manager.get_conversation_history(conversation_id) == []
+    manager.close()
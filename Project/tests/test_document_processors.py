@@ -1,17 +1,12 @@
 # test_document_processors.py
 import os
-import sys
 import logging
+from concurrent.futures import ProcessPoolExecutor
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Add the app directory to the path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-
 # Import our components
+from app.core.config import settings
 from app.document_processing.processor import BaseDocumentProcessor
 from app.document_processing.pdf_processor import PDFProcessor
 from app.document_processing.docx_processor import DocxProcessor
@@ -33,7 +28,7 @@ def test_processor(file_path):
         logger.info(f"Text length: {len(document.text)} characters")
         
         # Print first 200 characters of the document
-        logger.info(f"Text sample: {document.text[:200]}...")
+        logger.info("Text sample: %.200s...", document.text)
         
         # Test chunking
         chunks = processor.chunk(document)
@@ -41,15 +36,41 @@ def test_processor(file_path):
         
         # Print info about the first chunk
         if chunks:
-            logger.info(f"First chunk text sample: {chunks[0].text[:100]}...")
-            logger.info(f"First chunk metadata: {chunks[0].metadata}")
+            logger.info("First chunk text sample: %.100s...", chunks[0].text)
+            logger.info("First chunk metadata: %s", chunks[0].metadata)
         
         return True
     except Exception as e:
         logger.error(f"Error processing document: {e}")
         return False
 
+def test_txt_processor_matches_text_mode(tmp_path):
+    """A UTF-8 BOM is dropped and CRLF/CR line endings become LF, as when reading in text mode"""
+    file_path = tmp_path / "bom_crlf.txt"
+    file_path.write_bytes(b"\xef\xbb\xbfHello\r\nWorld\r\nOld\rMac\n")
+    
+    document = TxtProcessor().process(str(file_path))
+    
+    assert document.text == "Hello\nWorld\nOld\nMac\n"
+    assert document.text == file_path.read_text(encoding="utf-8-sig")
+
+def test_chunk_cache_hits_do_not_share_metadata(tmp_path, monkeypatch):
+    """Changing the metadata of chunks served from the chunk cache doesn't leak into later hits"""
+    monkeypatch.setattr(settings, "CHUNK_CACHE_DIR", str(tmp_path))
+    processor = TxtProcessor()
+    document = processor.process_text("First paragraph.\n\nSecond paragraph.", "cached.txt")
+    
+    expected = [dict(chunk.metadata) for chunk in processor.chunk(document)]
+    first_hit = processor.chunk(document)
+    for chunk in first_hit:
+        chunk.metadata["chunk_id"] = -1
+        chunk.metadata.setdefault("pages", []).append(99)
+    
+    assert [chunk.metadata for chunk in processor.chunk(document)] == expected
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
     # Create test directory if it doesn't exist
     test_dir = "test_files"
     os.makedirs(test_dir, exist_ok=True)
@@ -62,9 +83,15 @@ if __name__ == "__main__":
         "Part_1.txt"     # Replace with actual TXT file path
     ]
     
+    existing_files = []
     for file_path in test_files:
         if os.path.exists(file_path):
-            result = test_processor(file_path)
-            logger.info(f"Test result for {file_path}: {'Success' if result else 'Failure'}")
+            existing_files.append(file_path)
         else:
-            logger.warning(f"Test file not found: {file_path}")
\ No newline at end of file
+            logger.warning(f"Test file not found: {file_path}")
+    
+    # Parsing is CPU-bound, so each file is processed in its own process
+    if existing_files:
+        with ProcessPoolExecutor(max_workers=min(len(existing_files), os.cpu_count() or 1)) as executor:
+            for file_path, result in zip(existing_files, executor.map(test_processor, existing_files)):
+                logger.info(f"Test result for {file_path}: {'Success' if result else 'Failure'}")
\ No newline at end of file
@@ -0,0 +1,33 @@
+# test_embedding_batcher.py
+import asyncio
+import numpy as np
+
+from app.embeddings.embedding_batcher import EmbeddingBatcher
+
+def test_concurrent_callers_get_their_own_rows(counting_provider):
+    """Concurrent requests share one provider call and each gets its rows back in order"""
+    batcher = EmbeddingBatcher(counting_provider, max_batch_size=64, max_wait=0.05)
+    requests = [["alpha", "beta"], ["gamma"], ["beta", "delta", "alpha"]]
+
+    async def embed_all():
+        return await asyncio.gather(*(batcher.embed(texts) for texts in requests))
+
+    results = asyncio.run(embed_all())
+
+    assert len(counting_provider.calls) == 1
+    for texts, embeddings in zip(requests, results):
+        assert np.array_equal(embeddings, counting_provider.get_embeddings(texts))
+
+def test_provider_error_reaches_every_caller(counting_provider, monkeypatch):
+    """A failed batch raises in every request that was part of it"""
+    def fail(texts):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(counting_provider, "get_embeddings", fail)
+    batcher = EmbeddingBatcher(counting_provider, max_wait=0.05)
+
+    async def embed_all():
+        return await asyncio.gather(batcher.embed(["a"]), batcher.embed(["b"]), return_exceptions=True)
+
+    results = asyncio.run(embed_all())
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,60 @@
+# test_embedding_cache.py
+import copy
+import numpy as np
+
+from app.embeddings.cache import EmbeddingCache
+from app.embeddings.embedding_provider import CachedEmbeddingProvider, MemoryCachedEmbeddingProvider
+
+def test_memory_tier_sits_in_front_of_sqlite(tmp_path, counting_provider):
+    """Repeated texts are served from memory; a fresh process reads them from SQLite"""
+    base = counting_provider
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), "counting")
+    provider = MemoryCachedEmbeddingProvider(CachedEmbeddingProvider(base, cache), cache_size=16)
+
+    first = provider.get_embeddings(["alpha", "beta"])
+    second = provider.get_embeddings(["beta", "alpha"])
+
+    assert base.calls == [["alpha", "beta"]]
+    assert np.array_equal(second, first[::-1])
+    assert provider.cache_info()["hits"] == 2
+
+    # A new memory tier (e.g. after a restart) falls back to the persistent cache
+    restarted = MemoryCachedEmbeddingProvider(CachedEmbeddingProvider(base, cache), cache_size=16)
+    assert np.array_equal(restarted.get_embeddings(["alpha", "gamma"])[0], first[0])
+    assert base.calls == [["alpha", "beta"], ["gamma"]]
+    cache.close()
+
+def test_sqlite_cache_evicts_oldest_rows(tmp_path):
+    """The persistent cache keeps at most max_rows embeddings, dropping the oldest writes"""
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), "counting", max_rows=3)
+
+    for text in ["one", "two", "three", "four", "five"]:
+        cache.put_many([text], np.ones((1, 2), dtype=np.float32))
+
+    found = cache.get_many(["one", "two", "three", "four", "five"])
+    assert [embedding is not None for embedding in found] == [False, False, True, True, True]
+    cache.close()
+
+def test_sqlite_cache_row_count_survives_rewrites_and_reopen(tmp_path):
+    """Rewriting stored texts doesn't count as new rows, and a reopened cache counts the existing ones"""
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache(path, "counting", max_rows=3)
+    cache.put_many(["one", "two"], np.ones((2, 2), dtype=np.float32))
+    cache.put_many(["one", "two", "two"], np.ones((3, 2), dtype=np.float32))
+    cache.close()
+
+    reopened = EmbeddingCache(path, "counting", max_rows=3)
+    reopened.put_many(["three", "four"], np.ones((2, 2), dtype=np.float32))
+
+    found = reopened.get_many(["one", "two", "three", "four"])
+    assert [embedding is not None for embedding in found] == [False, True, True, True]
+    reopened.close()
+
+def test_wrappers_without_provider_raise_attribute_error(counting_provider):
+    """Attribute lookups on a wrapper whose provider isn't set yet fail cleanly instead of recursing"""
+    for wrapper_class in (CachedEmbeddingProvider, MemoryCachedEmbeddingProvider):
+        wrapper = wrapper_class.__new__(wrapper_class)
+        assert not hasattr(wrapper, "model_name")
+
+    provider = MemoryCachedEmbeddingProvider(counting_provider, cache_size=4)
+    assert copy.copy(provider).model_name == "counting"
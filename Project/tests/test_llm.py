@@ -1,14 +1,10 @@
 # test_llm.py
-import os
-import sys
+import asyncio
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
+from app.core.config import settings
 from app.llm.llm_provider import OllamaProvider
 
 def test_llm_service():
@@ -40,12 +36,12 @@ def test_llm_service():
         ]
         
         # Generate response
-        response = llm_service.generate_response(
+        response = asyncio.run(llm_service.generate_response(
             query=query,
             context=context,
             conversation_history=None,
             require_citations=True
-        )
+        ))
         
         logger.info(f"LLM response: {response['answer']}")
         logger.info(f"Citations: {response['citations']}")
@@ -55,7 +51,24 @@ def test_llm_service():
         logger.error(f"Error in LLM test: {e}")
         return None
 
+def test_prompt_keeps_rerank_order(monkeypatch):
+    """Context goes into the prompt in rerank order unless document order is configured"""
+    llm_service = OllamaProvider()
+    context = [
+        {"text": "Most relevant", "metadata": {"source": "b.txt", "page": 3, "chunk_id": 7}},
+        {"text": "Less relevant", "metadata": {"source": "a.txt", "page": 1, "chunk_id": 2}}
+    ]
+    
+    prompt = llm_service._build_prompt("Question?", context)
+    assert prompt.index("Most relevant") < prompt.index("Less relevant")
+    
+    monkeypatch.setattr(settings, "LLM_CONTEXT_DOCUMENT_ORDER", True)
+    prompt = llm_service._build_prompt("Question?", context)
+    assert prompt.index("Less relevant") < prompt.index("Most relevant")
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
     response = test_llm_service()
     if response:
         logger.info("LLM service test successful")
@@ -0,0 +1,42 @@
+# test_query_cache.py
+import chromadb
+import numpy as np
+
+from app.retrieval.query_cache import QueryCache
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+RESPONSE = {"answer": "Paris", "sources": []}
+
+def test_exact_hit_and_miss():
+    """Exact keys ignore case and whitespace but not the document or citation flag"""
+    cache = QueryCache()
+    key = QueryCache.make_key("What is  the capital?", "doc-1", True)
+    cache.put(key, _unit([1, 0, 0]), "doc-1", True, RESPONSE)
+
+    assert cache.get_exact(QueryCache.make_key("what is the CAPITAL?", "doc-1", True)) == RESPONSE
+    assert cache.get_exact(QueryCache.make_key("What is the capital?", "doc-2", True)) is None
+    assert cache.get_exact(QueryCache.make_key("What is the capital?", "doc-1", False)) is None
+
+def test_semantic_hit_and_miss():
+    """Similar embeddings hit within the same document; dissimilar ones miss"""
+    cache = QueryCache(similarity_threshold=0.95)
+    cache.put("key", _unit([1, 0, 0]), "doc-1", False, RESPONSE)
+
+    assert cache.get_similar(_unit([1, 0.1, 0]), "doc-1", False) == RESPONSE
+    assert cache.get_similar(_unit([1, 1, 0]), "doc-1", False) is None
+    assert cache.get_similar(_unit([1, 0, 0]), "doc-2", False) is None
+    assert cache.get_similar(_unit([1, 0, 0]), "doc-1", True) is None
+
+def test_persisted_hit_requires_same_fingerprint(tmp_path):
+    """Persisted responses are found by a new cache only while the model and prompt are unchanged"""
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    QueryCache(client=client, fingerprint="model-a").put("key", _unit([0, 1, 0]), "doc-1", False, RESPONSE)
+
+    restarted = QueryCache(client=client, fingerprint="model-a")
+    assert restarted.get_similar(_unit([0, 1, 0.05]), "doc-1", False) == RESPONSE
+
+    changed = QueryCache(client=client, fingerprint="model-b")
+    assert changed.get_similar(_unit([0, 1, 0.05]), "doc-1", False) is None
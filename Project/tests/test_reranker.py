@@ -1,50 +1,24 @@
 # test_reranker.py
 import os
-import sys
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-
 # Import our components
 from app.document_processing.processor import BaseDocumentProcessor
 from app.embeddings.embedding_provider import EmbeddingService
 from app.retrieval.vector_store import VectorStore
 from app.retrieval.reranker import Reranker
 
-def test_reranker(file_path):
+def test_reranker(indexed_doc, embedding_service, vector_store):
     """Test the re-ranker with retrieved results"""
-    logger.info(f"Testing re-ranker with file: {file_path}")
+    document_id, _, _ = indexed_doc
+    logger.info(f"Testing re-ranker with document: {document_id}")
     
     try:
-        # Get the appropriate processor
-        processor = BaseDocumentProcessor.get_processor_for_file(file_path)
-        
-        # Process the document
-        document = processor.process(file_path)
-        
-        # Chunk the document
-        chunks = processor.chunk(document)
-        
-        # Initialize embedding service
-        embedding_service = EmbeddingService()
-        
-        # Generate embeddings
-        document_data = embedding_service.embed_document_chunks(chunks)
-        
-        # Initialize vector store
-        vector_store = VectorStore()
-        
-        # Add document to vector store
-        document_id = vector_store.add_document(document_data)
-        
         # Test query
         test_query = "sample"  # Replace with a relevant query for your document
-        query_embedding = embedding_service.provider.get_embeddings([test_query])[0]
+        query_embedding = embedding_service.embed_query(test_query)
         
         # Get initial results
         results = vector_store.query(
@@ -66,8 +40,8 @@ def test_reranker(file_path):
         
         # Display re-ranking scores
         for i, result in enumerate(reranked_results):
-            logger.info(f"Result {i+1} score: {result.get('rerank_score', 'N/A')}")
-            logger.info(f"Result {i+1} text: {result['text'][:50]}...")
+            logger.info("Result %d score: %s", i + 1, result.get('rerank_score', 'N/A'))
+            logger.info("Result %d text: %.50s...", i + 1, result['text'])
         
         return reranked_results
     except Exception as e:
@@ -75,11 +49,19 @@ def test_reranker(file_path):
         return None
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
     # Test with a sample file
     test_file = "D:/Webosmotic-task/Part_1.txt"  # Replace with an actual file path
     
     if os.path.exists(test_file):
-        results = test_reranker(test_file)
+        processor = BaseDocumentProcessor.get_processor_for_file(test_file)
+        chunks = processor.chunk(processor.process(test_file))
+        embedding_service = EmbeddingService()
+        vector_store = VectorStore()
+        document_data = embedding_service.embed_document_chunks(chunks)
+        document_id = vector_store.add_document(document_data)
+        results = test_reranker((document_id, chunks, document_data), embedding_service, vector_store)
         if results:
             logger.info("Re-ranker test successful")
         else:
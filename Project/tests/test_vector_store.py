@@ -1,50 +1,34 @@
 # test_vector_store.py
 import os
-import sys
+import uuid
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-
 # Import our components
 from app.document_processing.processor import BaseDocumentProcessor
 from app.embeddings.embedding_provider import EmbeddingService
 from app.retrieval.vector_store import VectorStore
 
-def test_vector_store(file_path):
+# Number of chunks embedded and stored at a time
+BATCH_SIZE = 32
+
+def test_vector_store(chunks, embedding_service, vector_store):
     """Test storing and retrieving document embeddings"""
-    logger.info(f"Testing vector store with file: {file_path}")
+    logger.info(f"Testing vector store with {len(chunks)} chunks")
     
     try:
-        # Get the appropriate processor
-        processor = BaseDocumentProcessor.get_processor_for_file(file_path)
-        
-        # Process the document
-        document = processor.process(file_path)
-        
-        # Chunk the document
-        chunks = processor.chunk(document)
-        
-        # Initialize embedding service
-        embedding_service = EmbeddingService()
-        
-        # Generate embeddings
-        document_data = embedding_service.embed_document_chunks(chunks)
-        
-        # Initialize vector store
-        vector_store = VectorStore()
-        
-        # Add document to vector store
-        document_id = vector_store.add_document(document_data)
+        # Embed and store the chunks a batch at a time
+        document_id = str(uuid.uuid4())
+        for start in range(0, len(chunks), BATCH_SIZE):
+            batch = chunks[start:start + BATCH_SIZE]
+            embeddings = embedding_service.provider.get_embeddings([chunk.text for chunk in batch])
+            vector_store.add_batch(batch, embeddings, document_id, start_index=start)
         logger.info(f"Added document to vector store with ID: {document_id}")
         
         # Test query
         test_query = "sample"  # Replace with a relevant query for your document
-        query_embedding = embedding_service.provider.get_embeddings([test_query])[0]
+        query_embedding = embedding_service.embed_query(test_query)
         
         results = vector_store.query(
             query_text=test_query,
@@ -64,11 +48,15 @@ def test_vector_store(file_path):
         return None
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
     # Test with a sample file
     test_file = "D:/Webosmotic-task/Part_1.txt"  # Replace with an actual file path
     
     if os.path.exists(test_file):
-        results = test_vector_store(test_file)
+        processor = BaseDocumentProcessor.get_processor_for_file(test_file)
+        chunks = processor.chunk(processor.process(test_file))
+        results = test_vector_store(chunks, EmbeddingService(), VectorStore())
         if results:
             logger.info("Vector store test successful")
         else: